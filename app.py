@@ -1,10 +1,13 @@
 # app.py - Combined Leaderboard and Update Tool
 
+# Only what the home page needs is imported here. The scraper stack (requests,
+# bs4, gspread, ...) is imported on first use by the update page.
+import logging
+import threading
 import streamlit as st
 import pandas as pd
-import gspread
-import tournament_scraper # Your module
-import sys
+import leaderboard_store
+import leaderboard_view
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -15,61 +18,214 @@ st.set_page_config(
 
 # --- Constant ---
 GOOGLE_SHEET_NAME = "pocket viikkokisa leaderboard"
+# Seconds between background checks of the leaderboard revision
+LEADERBOARD_CHECK_INTERVAL = 60
+# Seconds between progress refreshes of the update jobs panel
+JOB_POLL_INTERVAL = 2
+# Page sizes offered for the leaderboard table
+PAGE_SIZES = [10, 25, 50, 100]
+
+# --- Leaderboard Storage ---
+@st.cache_resource
+def get_leaderboard_store():
+    """
+    Builds the leaderboard backend from the app secrets.
+    LEADERBOARD_BACKEND is 'sheets' (default) or 'sqlite'; with 'sqlite',
+    LEADERBOARD_DB_PATH sets the database file and EXPORT_TO_SHEET mirrors
+    new tournaments to the Google Sheet. GOOGLE_SHEET_KEY, if set, opens the
+    sheet by key instead of searching for it by name.
+    """
+    backend = st.secrets.get("LEADERBOARD_BACKEND", "sheets")
+    creds = dict(st.secrets["gcp_service_account"]) if "gcp_service_account" in st.secrets else None
+    return leaderboard_store.create_store(
+        backend,
+        sheet_name=GOOGLE_SHEET_NAME,
+        creds=creds,
+        db_path=st.secrets.get("LEADERBOARD_DB_PATH", leaderboard_store.DEFAULT_DB_PATH),
+        export_to_sheet=bool(st.secrets.get("EXPORT_TO_SHEET", False)),
+        sheet_key=st.secrets.get("GOOGLE_SHEET_KEY"),
+    )
+
+@st.cache_resource
+def get_leaderboard_cache():
+    """
+    Shared leaderboard cache; revalidated in the background against the store revision.
+    Its on-disk snapshot (LEADERBOARD_SNAPSHOT_PATH) lets a cold start render at once.
+    """
+    return leaderboard_store.LeaderboardCache(
+        get_leaderboard_store(),
+        check_interval=LEADERBOARD_CHECK_INTERVAL,
+        snapshot_path=st.secrets.get("LEADERBOARD_SNAPSHOT_PATH", leaderboard_store.DEFAULT_SNAPSHOT_PATH),
+    )
+
+@st.cache_resource
+def get_job_runner():
+    """Background runner for update jobs, shared by all sessions of this app process."""
+    import update_jobs
+    get_pipeline_metrics()
+    get_page_cache()
+    return update_jobs.JobRunner(
+        get_leaderboard_store(),
+        on_write=refresh_leaderboard_cache,
+        archive=get_match_archive(),
+        index=get_player_index(),
+    )
+
+@st.cache_resource
+def get_page_cache():
+    """
+    On-disk cache of tspool.fi pages (directory from PAGE_CACHE_DIR), set up once
+    before any update job fetches, so concurrent jobs share it.
+    """
+    import page_cache
+    import tournament_scraper
+    return tournament_scraper.configure_page_cache(st.secrets.get("PAGE_CACHE_DIR", page_cache.DEFAULT_CACHE_DIR))
+
+@st.cache_resource
+def get_pipeline_metrics():
+    """Per-stage run metrics of update jobs, exported to PIPELINE_METRICS_DIR."""
+    import pipeline_metrics
+    return pipeline_metrics.configure_metrics(st.secrets.get("PIPELINE_METRICS_DIR", pipeline_metrics.DEFAULT_METRICS_DIR))
+
+@st.cache_resource
+def get_match_archive():
+    """Columnar archive of every scraped match (directory from MATCH_ARCHIVE_DIR)."""
+    import match_archive
+    return match_archive.MatchArchive(st.secrets.get("MATCH_ARCHIVE_DIR", match_archive.DEFAULT_ARCHIVE_DIR))
+
+@st.cache_resource
+def get_player_index():
+    """
+    Head-to-head and rating index (database file from PLAYER_INDEX_PATH).
+    A new, empty index is filled once from the match archive on a background
+    thread, so the first render does not wait for the archive to be replayed.
+    """
+    import player_index
+    index = player_index.PlayerIndex(st.secrets.get("PLAYER_INDEX_PATH", player_index.DEFAULT_INDEX_PATH))
+    if not index.players():
+        archive_dir = st.secrets.get("MATCH_ARCHIVE_DIR")
+        threading.Thread(target=fill_player_index, args=(index, archive_dir), name="player-index-fill", daemon=True).start()
+    return index
+
+def fill_player_index(index, archive_dir: str | None):
+    """Replays the match archive into an empty player index."""
+    import match_archive
+    try:
+        archive = match_archive.MatchArchive(archive_dir or match_archive.DEFAULT_ARCHIVE_DIR)
+        if archive.seasons():
+            indexed = index.rebuild(archive.load_tournaments())
+            logging.info(f"Filled the player index with {indexed} archived tournaments.")
+    except Exception as e:
+        logging.error(f"Could not fill the player index from the match archive: {e}")
+
+def refresh_leaderboard_cache():
+    """
+    Reloads the shared leaderboard after a write. Best effort: the write has already
+    succeeded, so a failed reload only leaves the cache to revalidate on its next check.
+    """
+    cache = get_leaderboard_cache()
+    try:
+        cache.refresh(force=True)
+    except Exception as e:
+        logging.warning(f"Could not refresh the leaderboard cache after a write: {e}")
+        cache.invalidate()
 
 # --- Data Loading Function (for Homepage) ---
-@st.cache_data(ttl=600)
 def load_leaderboard_data():
     """
-    Connects to Google Sheets and fetches the leaderboard data.
+    Returns the cached leaderboard table and its revision. The table is shared by all sessions, so callers must not modify it.
     """
     try:
-        if "gcp_service_account" not in st.secrets:
-            st.error("GCP service account secret is not configured in app settings.")
-            return None
-        creds = dict(st.secrets["gcp_service_account"])
-        gc = gspread.service_account_from_dict(creds)
-        spreadsheet = gc.open(GOOGLE_SHEET_NAME)
-        worksheet = spreadsheet.sheet1
-        df = pd.DataFrame(worksheet.get_all_records())
-        # Ensure 'Total Points' is numeric
-        if 'Total Points' in df.columns:
-            df['Total Points'] = pd.to_numeric(df['Total Points'], errors='coerce')
-        return df
+        return get_leaderboard_cache().get()
     except Exception as e:
-        st.error(f"Failed to load data from Google Sheets: {e}")
-        return pd.DataFrame()
+        st.error(f"Failed to load leaderboard data: {e}")
+        return pd.DataFrame(), None
+
+
+@st.cache_resource(max_entries=2)
+def get_leaderboard_view(revision, _leaderboard):
+    """Display form of the leaderboard, built once per data revision and shared by all sessions."""
+    return leaderboard_view.LeaderboardView(_leaderboard)
+
+
+def leaderboard_view_for(leaderboard_df, revision):
+    # Without a revision there is no safe cache key, so the view is built for this run only
+    if revision is None:
+        return leaderboard_view.LeaderboardView(leaderboard_df)
+    return get_leaderboard_view(revision, leaderboard_df)
 
 
 # --- Page 1: Homepage / Leaderboard View ---
 def render_home_page():
     """Renders the main leaderboard display."""
     st.header("Pocket viikkokisat '25")
-    
-    leaderboard_df = load_leaderboard_data()
+
+    leaderboard_df, revision = load_leaderboard_data()
 
     if leaderboard_df is not None and not leaderboard_df.empty:
         if 'Rank' in leaderboard_df.columns and 'Player' in leaderboard_df.columns:
-            
-            leaderboard_df['Ranking'] = leaderboard_df['Rank'].astype(str) + '. ' + leaderboard_df['Player'].astype(str)
-            df_to_display = leaderboard_df.drop(columns=['Rank', 'Player'])
-            cols = df_to_display.columns.tolist()
-            cols = ['Ranking'] + [col for col in cols if col != 'Ranking']
-            df_to_display = df_to_display[cols]
-            df_to_display = df_to_display.set_index('Ranking')
-            
-            table_height = (len(df_to_display) + 1) * 35
-            
-            st.dataframe(
-                df_to_display, 
-                use_container_width=True,
-                height=table_height
-            )
+            render_leaderboard_table(leaderboard_df, revision)
         else:
             st.warning("Leaderboard is missing 'Rank' or 'Player' columns. Displaying raw data.")
             st.dataframe(leaderboard_df, use_container_width=True)
     else:
         st.warning("Leaderboard data could not be loaded or is empty.")
 
+    render_player_profile()
+
+
+@st.fragment
+def render_leaderboard_table(leaderboard_df, revision):
+    """
+    One page of the leaderboard, filtered by player name and tournament date range.
+    The table and its revision come from the same cache read, so fragment reruns
+    never file an old table's view under a newer revision.
+    """
+    view = leaderboard_view_for(leaderboard_df, revision)
+
+    search_col, size_col = st.columns([3, 1])
+    search = search_col.text_input("Search player", placeholder="Type part of a name...", on_change=reset_leaderboard_page)
+    page_size = size_col.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(leaderboard_view.DEFAULT_PAGE_SIZE),
+                                   on_change=reset_leaderboard_page)
+    date_from = date_to = None
+    if len(view.dates) > 1:
+        date_from, date_to = st.select_slider("Tournaments", options=view.dates, value=(view.dates[0], view.dates[-1]))
+
+    rows, matching, page_count = view.query(search, date_from, date_to, page=st.session_state.get('leaderboard_page', 1), page_size=page_size)
+    if matching == 0:
+        st.info("No players match the search.")
+        return
+    st.dataframe(rows, use_container_width=True, height=(len(rows) + 1) * 35 + 3)
+    if page_count > 1:
+        # The table may have shrunk since the page was picked
+        st.session_state.leaderboard_page = min(st.session_state.get('leaderboard_page', 1), page_count)
+        page_col, info_col = st.columns([1, 3])
+        page = page_col.number_input("Page", min_value=1, max_value=page_count, key='leaderboard_page')
+        info_col.caption(f"{matching} players, page {page} of {page_count}")
+
+
+def reset_leaderboard_page():
+    st.session_state.leaderboard_page = 1
+
+
+def render_player_profile():
+    """Player lookup: rating and head-to-head records from the player index."""
+    index = get_player_index()
+    players = index.players()
+    if not players:
+        return
+    st.subheader("Player profile")
+    player = st.selectbox("Player", players, index=None, placeholder="Choose a player...")
+    if not player:
+        return
+    profile = index.profile(player)
+    rating_col, record_col, tournaments_col = st.columns(3)
+    rating_col.metric("Rating", f"{profile['rating']:.0f}", help=f"Rank {profile['rating_rank']} by rating")
+    record_col.metric("Matches won / lost", f"{profile['wins']} / {profile['losses']}")
+    tournaments_col.metric("Tournaments", profile['tournaments'])
+    if profile['head_to_head']:
+        st.dataframe(pd.DataFrame(profile['head_to_head']).set_index('Opponent'), use_container_width=True)
+
 
 # --- Page 2: Update Tool View ---
 def render_update_page():
@@ -108,63 +264,109 @@ def render_update_page():
     
     with st.form(key='scraper_form'):
         tournament_id = st.number_input("Enter Tournament ID:", min_value=1, step=1)
+        refresh = st.checkbox("Re-fetch from tspool.fi even if the tournament is cached as finished",
+                              help="Use this after results were corrected; then rebuild the season to publish them.")
         submit_button = st.form_submit_button(label='Update tournament points')
 
     if submit_button:
         if not tournament_id:
             st.warning("Please enter a valid Tournament ID.")
         else:
-            try:
-                with st.spinner(f"Checking tournament {tournament_id}..."):
-                    creds = dict(st.secrets["gcp_service_account"])
-                    
-                    tournament_date = tournament_scraper.extract_tournament_date(tournament_id, headers=tournament_scraper.HEADERS)
-                    if not tournament_date:
-                        raise ValueError(f"Could not find a valid date for tournament ID {tournament_id}.")
-
-                    gc = gspread.service_account_from_dict(creds)
-                    spreadsheet = gc.open(GOOGLE_SHEET_NAME)
-                    worksheet = spreadsheet.sheet1
-                    header_row = worksheet.row_values(1)
-
-                    if tournament_date in header_row:
-                        st.warning(f"This tournament (Date: {tournament_date}) already exists in the leaderboard. No action taken.")
-                        return
-                    
-                    st.info(f"Tournament date {tournament_date} is new. Proceeding with full data extraction...")
-
-                with st.spinner(f"Processing tournament {tournament_id}..."):
-                    bracket_url = f"https://tspool.fi/kisa/{tournament_id}/kaavio/"
-                    results_url = f"https://tspool.fi/kisa/{tournament_id}/tulokset/"
-                    
-                    final_standings = tournament_scraper.extract_final_standings(results_url, headers=tournament_scraper.HEADERS)
-                    match_results = tournament_scraper.extract_match_data(bracket_url, headers=tournament_scraper.HEADERS)
-                    
-                    if not match_results:
-                        st.warning("Could not retrieve any valid match results from the bracket.")
-                        return
-
-                    player_wins = tournament_scraper.calculate_win_counts(match_results)
-                    points = tournament_scraper.calculate_tournament_points(match_results, player_wins, final_standings)
-
-                    if not points:
-                        st.warning("No player points were calculated for this tournament.")
-                        return
-                    
-                    st.info("Updating master leaderboard on Google Sheets...")
-                    tournament_scraper.update_leaderboard_sheet(
-                        tournament_date=tournament_date,
-                        tournament_points=points,
-                        sheet_name=GOOGLE_SHEET_NAME,
-                        creds=creds
-                    )
-                
-                st.success(f"Leaderboard '{GOOGLE_SHEET_NAME}' updated successfully!")
-                st.markdown("[Return to Homepage](/)")
-
-            except Exception as e:
-                st.error(f"An error occurred during processing:")
-                st.error(e)
+            job = get_job_runner().submit(int(tournament_id), refresh=refresh)
+            st.info(f"Update of tournament {job.tournament_id} is {job.status} (job {job.job_id}).")
+
+    render_update_jobs()
+    render_season_rebuild()
+    render_pipeline_runs()
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def render_update_jobs():
+    """Shows the progress of recent update jobs; re-runs on its own while the page is open."""
+    jobs = get_job_runner().recent_jobs()
+    if not jobs:
+        return
+    st.subheader("Recent updates")
+    for job in jobs:
+        label = f"Tournament {job.tournament_id}" + (f" ({job.tournament_date})" if job.tournament_date else "")
+        if job.status == 'done':
+            st.success(f"{label}: {job.message}")
+        elif job.status == 'skipped':
+            st.warning(f"{label}: {job.message}")
+        elif job.status == 'failed':
+            st.error(f"{label}: An error occurred during processing: {job.message}")
+        else:
+            st.progress(job.progress, text=f"{label}: {job.message}")
+    if any(job.status == 'done' for job in jobs):
+        st.markdown("[Return to Homepage](/)")
+
+
+def render_season_rebuild():
+    """Rescores the archived season with the current rules and republishes the whole leaderboard in one write."""
+    import tournament_scraper
+    archive = get_match_archive()
+    seasons = archive.seasons()
+    st.subheader("Rebuild season")
+    if not seasons:
+        st.caption("No archived tournaments yet. Tournaments are archived as they are updated.")
+        return
+    season = st.selectbox("Season", seasons[::-1])
+    preview_col, publish_col = st.columns(2)
+    preview = preview_col.button("Preview rebuild")
+    publish = publish_col.button("Rebuild and publish", type="primary")
+    if not (preview or publish):
+        return
+    runner = get_job_runner()
+    try:
+        with st.spinner("Rescoring archived tournaments..."), runner.write_lock:
+            report = tournament_scraper.rebuild_season(
+                get_leaderboard_store(), archive, rules=runner.rules, seasons=[season],
+                dry_run=not publish, index=None if preview else get_player_index(),
+            )
+    except Exception as e:
+        st.error(f"Could not rebuild the leaderboard: {e}")
+        return
+    if publish:
+        refresh_leaderboard_cache()
+    changed = report['changed_dates']
+    if publish:
+        st.success(f"Rebuilt {len(report['rebuilt_dates'])} tournaments; {len(changed)} of them changed.")
+    elif changed:
+        st.info(f"{len(changed)} of {len(report['rebuilt_dates'])} tournaments would change: {', '.join(changed)}")
+    else:
+        st.info(f"All {len(report['rebuilt_dates'])} archived tournaments already match the leaderboard.")
+    if report['kept_dates']:
+        st.warning(f"Not in the match archive, left as they are: {', '.join(report['kept_dates'])}")
+    if report['total_changes']:
+        st.dataframe(pd.DataFrame(report['total_changes']).set_index('Player'), use_container_width=True)
+
+
+def render_pipeline_runs():
+    """Per-stage timings of recent pipeline runs (update jobs and command-line runs sharing the metrics directory)."""
+    import pipeline_metrics
+    runs = get_pipeline_metrics().load_runs(limit=20)
+    if not runs:
+        return
+    with st.expander("Pipeline timings of recent runs"):
+        rows = []
+        for run in runs:
+            totals = pipeline_metrics.summarize_stages(run)
+            errors = sorted({f"{record['stage']}: {record['error']}" for record in run['stages'] if record['error']})
+            empty = sorted({record['stage'] for record in run['stages'] if record['outcome'] == 'empty'})
+            row = {
+                'Started': pd.to_datetime(run['started_at'], unit='s').strftime('%d.%m. %H:%M:%S'),
+                'Run': run['kind'],
+                'Tournament': run.get('tournament_id') or ", ".join(map(str, run.get('tournament_ids', []))),
+                'Status': run['status'] + (f" ({run['error']})" if run['error'] else ""),
+                'Total s': round(run['seconds'], 2),
+            }
+            for name in pipeline_metrics.STAGES:
+                row[f"{name} s"] = round(totals[name]['seconds'], 3) if name in totals else None
+            row['Fetched KiB'] = round(totals['fetch']['bytes'] / 1024, 1) if 'fetch' in totals else None
+            row['Errors'] = ", ".join(errors)
+            row['Empty'] = ", ".join(empty)
+            rows.append(row)
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
 
 
 # --- Main Router ---
@@ -0,0 +1,170 @@
+# benchmarks/bench_cold_start.py - Import time and time to first render of the Streamlit home page
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_cold_start
+#   python -m benchmarks.bench_cold_start --repeat 10 --sheet-latency 2.0 --json cold_start.json
+#
+# Every measurement runs in a fresh interpreter, so nothing is warm from an earlier one.
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the home page imports, and what the update page adds on top
+HOME_IMPORTS = ['streamlit', 'pandas', 'leaderboard_store']
+UPDATE_IMPORTS = ['tournament_scraper', 'update_jobs']
+# Scraper dependencies that should not be loaded by the home page
+HEAVY_MODULES = ['requests', 'bs4', 'lxml', 'gspread', 'google.auth']
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(repr((elapsed, sorted(m for m in {heavy!r} if m in sys.modules))))
+"""
+
+RENDER_PROBE = """
+import logging, sys, time
+logging.disable(logging.CRITICAL)
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=60)
+app.secrets['LEADERBOARD_BACKEND'] = 'sqlite'
+app.secrets['LEADERBOARD_DB_PATH'] = {db!r}
+app.secrets['LEADERBOARD_SNAPSHOT_PATH'] = {snapshot!r}
+app.secrets['PLAYER_INDEX_PATH'] = {index!r}
+app.secrets['MATCH_ARCHIVE_DIR'] = {archive!r}
+app.run()
+elapsed = time.perf_counter() - start
+assert not app.exception, app.exception
+print(repr((elapsed, sorted(m for m in {heavy!r} if m in sys.modules))))
+"""
+
+SHEET_PROBE = """
+import logging, sys, time
+sys.path.insert(0, {root!r})
+logging.disable(logging.CRITICAL)
+import leaderboard_store
+
+class SlowStore(leaderboard_store.SQLiteStore):
+    # Stands in for Google Sheets: each call pays the given round-trip latency
+    def revision(self):
+        time.sleep({latency!r})
+        return super().revision()
+
+    def load_leaderboard(self):
+        time.sleep({latency!r})
+        return super().load_leaderboard()
+
+start = time.perf_counter()
+cache = leaderboard_store.LeaderboardCache(SlowStore({db!r}), snapshot_path={snapshot!r})
+frame, revision = cache.get()
+elapsed = time.perf_counter() - start
+print(repr((elapsed, len(frame))))
+"""
+
+
+def run_probe(code: str, cwd: str) -> tuple:
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Probe failed:\n{result.stderr}")
+    return ast.literal_eval(result.stdout.strip().splitlines()[-1])
+
+
+def timed(label: str, code: str, cwd: str, repeat: int, setup=None) -> dict:
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        elapsed, detail = run_probe(code, cwd)
+        times.append(elapsed)
+    return {'measurement': label, 'best_ms': min(times) * 1000, 'median_ms': statistics.median(times) * 1000, 'detail': detail}
+
+
+def build_leaderboard_db(path: str, tournaments: int, archive_dir: str):
+    """
+    A SQLite leaderboard holding `tournaments` copies of the typical synthetic
+    fixture, with the same tournaments in a match archive at `archive_dir`.
+    """
+    import tournament_scraper
+    from benchmarks.bench_pipeline import season_dates
+    from benchmarks.fixtures import load_fixtures
+    from leaderboard_store import SQLiteStore
+    from match_archive import MatchArchive
+    pages = load_fixtures(['typical'])['typical']
+    page = tournament_scraper.TournamentPage.from_html(1, pages['info'], pages['results'], pages['bracket']).to_dict()
+    points = tournament_scraper.score_tournament(page, tournament_scraper.DEFAULT_RULES)
+    season = [{'tournament_id': i, 'date': date, 'points': points, 'matches': page['matches'], 'standings': page['standings']}
+              for i, date in enumerate(season_dates(tournaments))]
+    store = SQLiteStore(path)
+    store.add_tournaments(season)
+    store._conn.close()
+    MatchArchive(archive_dir).add_tournaments(season)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the cold start of the Streamlit home page in fresh interpreters.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh-interpreter runs per measurement (default: 5).")
+    parser.add_argument("--tournaments", type=int, default=30, help="Tournaments on the benchmark leaderboard (default: 30).")
+    parser.add_argument("--sheet-latency", type=float, default=1.0, help="Simulated Google Sheets round trip in seconds (default: 1.0).")
+    parser.add_argument("--json", help="Also write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.CRITICAL)
+    workdir = tempfile.mkdtemp(prefix='cold_start_')
+    db = os.path.join(workdir, 'leaderboard.sqlite3')
+    snapshot = os.path.join(workdir, 'leaderboard_snapshot.arrow')
+    no_snapshot = os.path.join(workdir, 'missing', 'leaderboard_snapshot.arrow')
+    archive = os.path.join(workdir, 'match_archive')
+    build_leaderboard_db(db, args.tournaments, archive)
+
+    def drop_snapshot():
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+
+    def import_code(modules):
+        return IMPORT_PROBE.format(imports="\n".join(f"import {m}" for m in modules), heavy=HEAVY_MODULES)
+
+    def render_code(snapshot_path):
+        return RENDER_PROBE.format(app=os.path.join(REPO_ROOT, 'app.py'), db=db, snapshot=snapshot_path,
+                                   index=os.path.join(workdir, 'player_index.sqlite3'),
+                                   archive=archive, heavy=HEAVY_MODULES)
+
+    def sheet_code(snapshot_path):
+        return SHEET_PROBE.format(root=REPO_ROOT, latency=args.sheet_latency, db=db, snapshot=snapshot_path)
+
+    results = [
+        timed('import: home page modules', import_code(HOME_IMPORTS), workdir, args.repeat),
+        timed('import: home + update page modules', import_code(HOME_IMPORTS + UPDATE_IMPORTS), workdir, args.repeat),
+        timed('first render: no snapshot', render_code(no_snapshot), workdir, args.repeat),
+    ]
+    # One render writes the snapshot; the following ones start from it
+    run_probe(render_code(snapshot), workdir)
+    results.append(timed('first render: from snapshot', render_code(snapshot), workdir, args.repeat))
+    results.append(timed(f'first get(), {args.sheet_latency:g}s store: no snapshot', sheet_code(snapshot), workdir, args.repeat, setup=drop_snapshot))
+    run_probe(sheet_code(snapshot), workdir)
+    results.append(timed(f'first get(), {args.sheet_latency:g}s store: from snapshot', sheet_code(snapshot), workdir, args.repeat))
+
+    header = f"{'measurement':<45} {'best ms':>10} {'median ms':>10}  detail"
+    print(f"Python {sys.version.split()[0]}, {args.tournaments} tournaments")
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['measurement']:<45} {r['best_ms']:>10.1f} {r['median_ms']:>10.1f}  {r['detail']}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/bench_pipeline.py - Offline benchmarks for the scrape-and-score pipeline
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_pipeline                      # all fixtures
+#   python -m benchmarks.bench_pipeline --fixtures large synthetic-256 --repeat 10
+#   python -m benchmarks.bench_pipeline --record 848 --name typical   # save live pages as a fixture
+#   python -m benchmarks.bench_pipeline --json bench_output.json
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+
+import tournament_scraper
+from leaderboard_store import merge_leaderboard_grid, write_leaderboard_worksheet
+from scoring import score_season
+from benchmarks.fixtures import load_fixtures, record_tournament
+from benchmarks.fake_sheets import FakeSpreadsheet, FakeWorksheet
+
+# Number of earlier tournaments already on the fake leaderboard when the sheet write is measured
+SEASON_LENGTH = 30
+
+
+def measure(stage: str, fixture: str, func, setup=None, repeat: int = 5, num_bytes: int = 0, items: int = 0) -> dict:
+    """
+    Runs `func(setup())` `repeat` times for wall time, then once more under
+    tracemalloc for the peak allocation. setup() is never timed.
+    """
+    setup = setup or (lambda: None)
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        func(state)
+        times.append(time.perf_counter() - start)
+    state = setup()
+    tracemalloc.start()
+    func(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = min(times)
+    return {
+        'stage': stage,
+        'fixture': fixture,
+        'best_ms': best * 1000,
+        'median_ms': statistics.median(times) * 1000,
+        'peak_kib': peak / 1024,
+        'mb_per_s': (num_bytes / 1e6) / best if num_bytes and best else None,
+        'items_per_s': items / best if items and best else None,
+    }
+
+
+def season_dates(n: int) -> list:
+    return [f"{1 + i % 28:02d}.{1 + i // 28:02d}.2024" for i in range(n)]
+
+
+def bench_fixture(name: str, pages: dict, repeat: int) -> list:
+    results = []
+    bracket_bytes = len(pages['bracket'].encode('utf-8'))
+    results_bytes = len(pages['results'].encode('utf-8'))
+
+    results.append(measure('parse_tournament_date', name, lambda _: tournament_scraper.parse_tournament_date(pages['info']),
+                           repeat=repeat, num_bytes=len(pages['info'].encode('utf-8'))))
+    results.append(measure('parse_final_standings', name, lambda _: tournament_scraper.parse_final_standings(pages['results']),
+                           repeat=repeat, num_bytes=results_bytes))
+    matches = tournament_scraper.parse_match_data(pages['bracket'])
+    results.append(measure('parse_match_data', name, lambda _: tournament_scraper.parse_match_data(pages['bracket']),
+                           repeat=repeat, num_bytes=bracket_bytes, items=len(matches)))
+
+    standings = tournament_scraper.parse_final_standings(pages['results'])
+    results.append(measure('calculate_win_counts', name, lambda _: tournament_scraper.calculate_win_counts(matches),
+                           repeat=repeat, items=len(matches)))
+    win_counts = tournament_scraper.calculate_win_counts(matches)
+    results.append(measure('calculate_tournament_points', name,
+                           lambda _: tournament_scraper.calculate_tournament_points(matches, win_counts, standings),
+                           repeat=repeat, items=len(matches)))
+    points = tournament_scraper.calculate_tournament_points(matches, win_counts, standings)
+
+    season = [{'date': date, 'matches': matches, 'standings': standings} for date in season_dates(SEASON_LENGTH)]
+    results.append(measure(f'score_season[{SEASON_LENGTH}]', name, lambda _: score_season(season),
+                           repeat=repeat, items=len(matches) * SEASON_LENGTH))
+
+    # The leaderboard already holds a season of this fixture; one more tournament is added
+    existing = merge_leaderboard_grid([], {date: points for date in season_dates(SEASON_LENGTH)})[0]
+
+    def fresh_sheet():
+        worksheet = FakeWorksheet(existing)
+        return FakeSpreadsheet(worksheet), worksheet
+
+    results.append(measure('update_leaderboard_sheet', name,
+                           lambda state: write_leaderboard_worksheet(state[0], state[1], {'31.12.2025': points}),
+                           setup=fresh_sheet, repeat=repeat, items=len(points)))
+    return results
+
+
+def format_table(results: list) -> str:
+    header = f"{'fixture':<15} {'stage':<30} {'best ms':>10} {'median ms':>10} {'peak KiB':>10} {'MB/s':>8} {'items/s':>12}"
+    lines = [header, '-' * len(header)]
+    for r in results:
+        mb = f"{r['mb_per_s']:.2f}" if r['mb_per_s'] else '-'
+        items = f"{r['items_per_s']:.0f}" if r['items_per_s'] else '-'
+        lines.append(f"{r['fixture']:<15} {r['stage']:<30} {r['best_ms']:>10.3f} {r['median_ms']:>10.3f} {r['peak_kib']:>10.1f} {mb:>8} {items:>12}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the scrape-and-score pipeline offline against HTML fixtures.")
+    parser.add_argument("--fixtures", nargs='+', help="Fixture names to run (default: all synthetic and recorded fixtures).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage (default: 5).")
+    parser.add_argument("--json", help="Also write the results as JSON to this file.")
+    parser.add_argument("--record", type=int, metavar="TOURNAMENT_ID", help="Save the live pages of a tournament as a fixture and exit.")
+    parser.add_argument("--name", help="Fixture name for --record (default: tournament_<id>).")
+    args = parser.parse_args()
+
+    if args.record:
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        directory = record_tournament(args.record, args.name or f"tournament_{args.record}")
+        print(f"Saved fixture to {directory}")
+        return
+
+    # The pipeline logs at INFO level on every call; keep that out of the timings
+    logging.basicConfig(level=logging.ERROR)
+    try:
+        fixtures = load_fixtures(args.fixtures)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"HTML parser: {tournament_scraper.HTML_PARSER}, Python {sys.version.split()[0]}")
+    results = []
+    for name, pages in fixtures.items():
+        results.extend(bench_fixture(name, pages, args.repeat))
+    print(format_table(results))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
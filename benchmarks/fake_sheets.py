@@ -0,0 +1,71 @@
+# benchmarks/fake_sheets.py - In-memory stand-in for the gspread objects used by the pipeline
+
+class FakeWorksheet:
+    """Holds the sheet as a list of rows and answers the read calls the pipeline makes."""
+
+    def __init__(self, values: list | None = None, row_count: int = 1000, col_count: int = 26):
+        self.id = 0
+        self.values = [list(row) for row in values or []]
+        self.row_count = max(row_count, len(self.values))
+        self.col_count = max(col_count, max((len(row) for row in self.values), default=0))
+
+    def get_all_values(self) -> list:
+        width = max((len(row) for row in self.values), default=0)
+        return [[str(v) for v in row] + [''] * (width - len(row)) for row in self.values]
+
+    def get_all_records(self) -> list:
+        values = self.get_all_values()
+        if not values:
+            return []
+        header = values[0]
+        return [dict(zip(header, row)) for row in values[1:]]
+
+    def row_values(self, row: int) -> list:
+        return [str(v) for v in self.values[row - 1]] if row <= len(self.values) else []
+
+    def _set(self, r: int, c: int, value):
+        if r >= self.row_count or c >= self.col_count:
+            raise ValueError(f"Cell ({r}, {c}) exceeds grid limits {self.row_count}x{self.col_count}.")
+        while len(self.values) <= r:
+            self.values.append([])
+        row = self.values[r]
+        while len(row) <= c:
+            row.append('')
+        row[c] = value
+
+
+class FakeSpreadsheet:
+    """Applies the appendDimension / updateCells / sortRange requests of a batchUpdate to one FakeWorksheet."""
+
+    def __init__(self, worksheet: FakeWorksheet):
+        self.sheet1 = worksheet
+        self.batch_update_calls = 0
+
+    def batch_update(self, body: dict) -> dict:
+        self.batch_update_calls += 1
+        ws = self.sheet1
+        for request in body['requests']:
+            if 'appendDimension' in request:
+                spec = request['appendDimension']
+                if spec['dimension'] == 'ROWS':
+                    ws.row_count += spec['length']
+                else:
+                    ws.col_count += spec['length']
+            elif 'updateCells' in request:
+                spec = request['updateCells']
+                start_row = spec['range']['startRowIndex']
+                start_col = spec['range']['startColumnIndex']
+                for dr, row in enumerate(spec['rows']):
+                    for dc, cell in enumerate(row['values']):
+                        value = cell.get('userEnteredValue', {})
+                        ws._set(start_row + dr, start_col + dc, value.get('numberValue', value.get('stringValue', '')))
+            elif 'sortRange' in request:
+                spec = request['sortRange']
+                rows = ws.values[spec['range']['startRowIndex']:spec['range']['endRowIndex']]
+                for sort_spec in reversed(spec['sortSpecs']):
+                    index = sort_spec['dimensionIndex']
+                    rows.sort(key=lambda row: float(row[index] or 0), reverse=sort_spec['sortOrder'] == 'DESCENDING')
+                ws.values[spec['range']['startRowIndex']:spec['range']['endRowIndex']] = rows
+            else:
+                raise NotImplementedError(f"FakeSpreadsheet does not support request {list(request)}")
+        return {'replies': []}
@@ -0,0 +1,164 @@
+# benchmarks/fixtures.py - HTML fixtures for the offline pipeline benchmarks
+
+import os
+import random
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+PAGE_NAMES = ("info", "results", "bracket")
+# Synthetic bracket sizes (number of players) used when no recorded pages exist
+SYNTHETIC_SIZES = {"small": 8, "typical": 24, "large": 64, "synthetic-256": 256}
+
+FINNISH_MONTH_NAMES = [
+    "tammikuuta", "helmikuuta", "maaliskuuta", "huhtikuuta", "toukokuuta", "kesäkuuta",
+    "heinäkuuta", "elokuuta", "syyskuuta", "lokakuuta", "marraskuuta", "joulukuuta",
+]
+
+PAGE_HEADER = """<!DOCTYPE html>
+<html lang="fi"><head><meta charset="utf-8"><title>Viikkokisa - tspool.fi</title>
+<link rel="stylesheet" href="/static/css/bootstrap.min.css"><script src="/static/js/app.js"></script></head>
+<body><nav class="navbar navbar-expand-lg"><ul class="navbar-nav">
+<li class="nav-item"><a class="nav-link" href="/kisat/">Kisat</a></li>
+<li class="nav-item"><a class="nav-link" href="/ranking/">Ranking</a></li>
+<li class="nav-item"><a class="nav-link" href="/pelaajat/">Pelaajat</a></li></ul></nav>
+<main class="container">
+"""
+PAGE_FOOTER = """</main><footer class="footer"><p>&copy; tspool.fi</p></footer></body></html>
+"""
+
+
+def _player_names(n_players: int, rng: random.Random) -> list:
+    first = ["Mikko", "Jari", "Antti", "Timo", "Sami", "Pekka", "Juha", "Ville", "Olli", "Kari", "Anna", "Laura"]
+    last = ["Virtanen", "Korhonen", "Mäkinen", "Nieminen", "Laine", "Heikkinen", "Koskinen", "Järvinen", "Lehtonen", "Saarinen"]
+    names = set()
+    while len(names) < n_players:
+        names.add(f"{rng.choice(first)} {rng.choice(last)} {rng.randint(1, 999)}")
+    return sorted(names)
+
+
+def _match_cell(home: str, away: str, home_score: int | None, away_score: int | None, match_no: int) -> str:
+    if home_score is None:
+        scores = ""
+    else:
+        home_cls = "home-score winner" if home_score > away_score else "home-score"
+        away_cls = "away-score winner" if away_score > home_score else "away-score"
+        scores = f'<div class="{home_cls}">{home_score}</div><div class="{away_cls}">{away_score}</div>'
+    return (
+        f'<td class="text-md-end"><div class="match" data-match="{match_no}">'
+        f'<span class="match-no">#{match_no}</span>'
+        f'<div class="home-name">{home} <small>(Pool Club)</small></div>'
+        f'<div class="away-name">{away} <small>(Pool Club)</small></div>'
+        f'{scores}<span class="table-no">Pöytä {match_no % 12 + 1}</span></div></td>'
+    )
+
+
+def synthetic_tournament(n_players: int, seed: int = 848, unplayed_ratio: float = 0.05) -> dict:
+    """
+    Builds info, results and bracket pages shaped like tspool.fi's for a
+    double-elimination tournament of `n_players` (about 2 * n_players matches).
+    Byes are 'WO' pairings, a few players forfeit ('FF ') and a small share of
+    matches is left unplayed.
+    """
+    rng = random.Random(seed)
+    players = _player_names(n_players, rng)
+    day, month, year = rng.randint(1, 28), rng.randint(1, 12), 2025
+
+    cells = []
+    match_no = 0
+    alive = list(players)
+    losers = []
+    eliminated = []
+    while len(alive) + len(losers) > 1:
+        for bracket in (alive, losers):
+            rng.shuffle(bracket)
+            next_round, dropped = [], []
+            if len(bracket) % 2:
+                bye = bracket.pop()
+                match_no += 1
+                cells.append(_match_cell(bye, "WO", 0, 0, match_no))
+                next_round.append(bye)
+            for i in range(0, len(bracket), 2):
+                home, away = bracket[i], bracket[i + 1]
+                match_no += 1
+                if rng.random() < 0.02:
+                    cells.append(_match_cell(f"FF {away}", home, 0, 0, match_no))
+                    winner, loser = home, away
+                elif rng.random() < unplayed_ratio:
+                    cells.append(_match_cell(home, away, None, None, match_no))
+                    winner, loser = home, away
+                else:
+                    winner_first = rng.random() < 0.5
+                    win_score, lose_score = 5, rng.randint(0, 4)
+                    cells.append(_match_cell(home, away, win_score if winner_first else lose_score, lose_score if winner_first else win_score, match_no))
+                    winner, loser = (home, away) if winner_first else (away, home)
+                next_round.append(winner)
+                dropped.append(loser)
+            if bracket is alive:
+                alive[:] = next_round
+                losers.extend(dropped)
+            else:
+                losers[:] = next_round
+                eliminated.extend(dropped)
+        if len(alive) == 1 and len(losers) == 1:
+            match_no += 1
+            cells.append(_match_cell(alive[0], losers[0], 5, 3, match_no))
+            eliminated.append(losers.pop())
+
+    rows = "\n".join("<tr>" + "".join(cells[i:i + 4]) + "</tr>" for i in range(0, len(cells), 4))
+    bracket_html = PAGE_HEADER + f'<table class="table bracket">\n{rows}\n</table>\n' + PAGE_FOOTER
+
+    ranking = alive + eliminated[::-1]
+    result_rows = "\n".join(
+        f'<div class="row result-row"><div class="col-1">{rank}.</div><div class="col">{name}</div></div>'
+        for rank, name in enumerate(ranking, start=1)
+    )
+    results_html = PAGE_HEADER + f'<div class="results">\n{result_rows}\n</div>\n' + PAGE_FOOTER
+
+    info_html = PAGE_HEADER + (
+        f'<h1>Pocket viikkokisa</h1><p><span class="fw-bold">Päivä</span>: {day}. {FINNISH_MONTH_NAMES[month - 1]} {year}</p>'
+        f'<p><span class="fw-bold">Paikka</span>: Biljardikeskus</p>'
+    ) + PAGE_FOOTER
+    return {"info": info_html, "results": results_html, "bracket": bracket_html}
+
+
+def load_recorded(name: str) -> dict | None:
+    """Loads pages saved with record_tournament() from fixtures/<name>/, or None if absent."""
+    directory = os.path.join(FIXTURES_DIR, name)
+    if not os.path.isdir(directory):
+        return None
+    pages = {}
+    for page in PAGE_NAMES:
+        with open(os.path.join(directory, f"{page}.html"), encoding="utf-8") as f:
+            pages[page] = f.read()
+    return pages
+
+
+def record_tournament(tournament_id: int, name: str) -> str:
+    """Saves the live tspool.fi pages of a tournament as fixtures/<name>/{info,results,bracket}.html."""
+    import tournament_scraper
+    urls = tournament_scraper.tournament_page_urls(tournament_id)
+    directory = os.path.join(FIXTURES_DIR, name)
+    os.makedirs(directory, exist_ok=True)
+    for page in PAGE_NAMES:
+        html = tournament_scraper.get_page_text(urls[page])
+        with open(os.path.join(directory, f"{page}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+    return directory
+
+
+def load_fixtures(names: list | None = None) -> dict:
+    """
+    Returns {name: pages} for the requested fixtures. Recorded pages under
+    fixtures/ take precedence over the synthetic brackets of the same name;
+    any other recorded directory is included as well.
+    """
+    recorded = sorted(d for d in os.listdir(FIXTURES_DIR) if os.path.isdir(os.path.join(FIXTURES_DIR, d))) if os.path.isdir(FIXTURES_DIR) else []
+    all_names = list(SYNTHETIC_SIZES) + [d for d in recorded if d not in SYNTHETIC_SIZES]
+    fixtures = {}
+    for name in names or all_names:
+        pages = load_recorded(name)
+        if pages is None:
+            if name not in SYNTHETIC_SIZES:
+                raise ValueError(f"Unknown fixture '{name}'. Record it first or use one of {list(SYNTHETIC_SIZES)}.")
+            pages = synthetic_tournament(SYNTHETIC_SIZES[name])
+        fixtures[name] = pages
+    return fixtures
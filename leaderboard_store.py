@@ -0,0 +1,727 @@
+# leaderboard_store.py - Storage backends for the season leaderboard
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_DB_PATH = "leaderboard.sqlite3"
+DEFAULT_SNAPSHOT_PATH = "leaderboard_snapshot.arrow"
+SNAPSHOT_REVISION_KEY = b'leaderboard_revision'
+
+
+def parse_date_column(column) -> datetime | None:
+    try:
+        return datetime.strptime(str(column), '%d.%m.%Y')
+    except ValueError:
+        return None
+
+
+def _to_int(value) -> int:
+    try:
+        return int(float(str(value).replace(',', '.')))
+    except ValueError:
+        return 0
+
+
+def tournaments_by_date(tournaments: list) -> dict:
+    """
+    Orders processed tournaments (dicts with 'tournament_id', 'date' and 'points')
+    by date and keys them by date. Tournaments without points, and any second
+    tournament on an already used date, are skipped.
+    """
+    by_date = {}
+    for tournament in sorted(tournaments, key=lambda t: parse_date_column(t['date'])):
+        if not tournament.get('points'):
+            continue
+        if tournament['date'] in by_date:
+            logging.warning(f"Tournament {tournament.get('tournament_id')} has the same date ({tournament['date']}) as an earlier tournament in this batch. Skipping it.")
+            continue
+        by_date[tournament['date']] = tournament
+    return by_date
+
+
+def build_leaderboard_frame(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pivots long-form results (columns: date, player, total_points) into the
+    leaderboard layout: Rank, Player, one column per date in date order, Total Points.
+    """
+    if results.empty:
+        return pd.DataFrame(columns=['Rank', 'Player', 'Total Points'])
+    wide = results.pivot_table(index='player', columns='date', values='total_points', aggfunc='sum', fill_value=0)
+    date_columns = sorted(wide.columns, key=parse_date_column)
+    wide = wide[date_columns].astype(int)
+    wide['Total Points'] = wide.sum(axis=1).astype(int)
+    wide = wide.sort_values(by='Total Points', ascending=False, kind='stable')
+    wide = wide.reset_index().rename(columns={'player': 'Player'})
+    wide.columns.name = None
+    wide.insert(0, 'Rank', range(1, 1 + len(wide)))
+    return wide[['Rank', 'Player'] + date_columns + ['Total Points']]
+
+
+def diff_season_points(old: dict, new: dict) -> dict:
+    """
+    Compares season points ({date: {player: total points}}) before and after the
+    dates in `new` are replaced. Dates only in `old` are kept as they are.
+    """
+    changed_dates = []
+    changed_players = set()
+    for date, points in new.items():
+        before = old.get(date, {})
+        players = {player for player in set(before) | set(points) if before.get(player, 0) != points.get(player, 0)}
+        if players or date not in old:
+            changed_dates.append(date)
+        changed_players |= players
+    merged = {**old, **new}
+    totals_before, totals_after = {}, {}
+    for season, totals in ((old, totals_before), (merged, totals_after)):
+        for points in season.values():
+            for player, value in points.items():
+                totals[player] = totals.get(player, 0) + value
+    return {
+        'rebuilt_dates': sorted(new, key=parse_date_column),
+        'changed_dates': sorted(changed_dates, key=parse_date_column),
+        'kept_dates': sorted(set(old) - set(new), key=parse_date_column),
+        'total_changes': [
+            {'Player': player, 'Before': totals_before.get(player, 0), 'After': totals_after.get(player, 0)}
+            for player in sorted(changed_players, key=lambda p: -totals_after.get(p, 0))
+            if totals_before.get(player, 0) != totals_after.get(player, 0)
+        ],
+    }
+
+
+def merge_leaderboard_grid(existing_values: list, tournaments: dict, overwrite: bool = False, replace: bool = False) -> tuple[list, list] | None:
+    """Adds tournaments ({date: points}) to a leaderboard grid as returned by worksheet.get_all_values().
+
+    Existing rows keep their position and new players are appended below them, so
+    a diff against the old grid only touches the new date columns, the Total Points
+    and Rank cells and the new rows. Rank is recomputed from the totals; ties keep the
+    current row order. Dates already on the sheet are skipped, unless `overwrite` is
+    set: then the given players' cells in that column are replaced and all other
+    cells kept. With `replace`, the given dates' columns are rewritten entirely
+    (players missing from a tournament get 0) and players left without any points
+    are dropped. Returns (new_grid, written_dates), or None if nothing was written.
+    """
+    header = [str(col) for col in existing_values[0]] if existing_values else []
+    if header and 'Player' not in header:
+        raise ValueError("The leaderboard sheet has no 'Player' column.")
+    date_columns = []
+    for col in header:
+        if col in ('Rank', 'Player', 'Total Points'):
+            continue
+        if parse_date_column(col):
+            date_columns.append(col)
+        else:
+            logging.warning(f"Ignoring non-date column '{col}' during final sorting and display.")
+    players = []
+    scores = {}
+    for row in existing_values[1:]:
+        row = list(row) + [''] * (len(header) - len(row))
+        values = dict(zip(header, row))
+        player = str(values['Player'])
+        if not player or player in scores:
+            continue
+        players.append(player)
+        scores[player] = {date: _to_int(values[date]) for date in date_columns}
+    added_dates = []
+    for tournament_date, tournament_points in tournaments.items():
+        if tournament_date in date_columns:
+            if replace:
+                for player_scores in scores.values():
+                    player_scores.pop(tournament_date, None)
+            elif not overwrite:
+                logging.warning(f"Tournament date {tournament_date} already exists in Google Sheet. Skipping update.")
+                continue
+        else:
+            date_columns.append(tournament_date)
+        added_dates.append(tournament_date)
+        for entry in tournament_points:
+            if entry['Player'] not in scores:
+                players.append(entry['Player'])
+                scores[entry['Player']] = {}
+            scores[entry['Player']][tournament_date] = int(entry['Total Points'])
+    if not added_dates:
+        return None
+    if replace:
+        players = [player for player in players if any(scores[player].values())]
+    sorted_date_columns = sorted(date_columns, key=parse_date_column)
+    totals = {player: sum(scores[player].values()) for player in players}
+    ranks = {player: rank for rank, player in enumerate(sorted(players, key=lambda p: -totals[p]), start=1)}
+    new_grid = [['Rank', 'Player'] + sorted_date_columns + ['Total Points']]
+    for player in players:
+        new_grid.append([ranks[player], player] + [scores[player].get(date, 0) for date in sorted_date_columns] + [totals[player]])
+    return new_grid, added_dates
+
+
+def diff_leaderboard_grid(old_grid: list, new_grid: list) -> list:
+    """Returns the (row, column, value) cells that differ; cells only present in the old grid get value None."""
+    n_rows = max(len(old_grid), len(new_grid))
+    n_cols = max([len(row) for row in old_grid + new_grid], default=0)
+    changes = []
+    for r in range(n_rows):
+        old_row = old_grid[r] if r < len(old_grid) else []
+        new_row = new_grid[r] if r < len(new_grid) else []
+        for c in range(n_cols):
+            old_value = str(old_row[c]) if c < len(old_row) else ''
+            new_value = new_row[c] if c < len(new_row) else None
+            if old_value != ('' if new_value is None else str(new_value)):
+                changes.append((r, c, new_value))
+    return changes
+
+
+def _cell_data(value) -> dict:
+    if value is None or value == '':
+        return {}
+    if isinstance(value, (int, float)):
+        return {'userEnteredValue': {'numberValue': value}}
+    return {'userEnteredValue': {'stringValue': str(value)}}
+
+
+def build_leaderboard_requests(sheet_id: int, changes: list, grid_size: tuple, new_size: tuple) -> list:
+    """Turns changed cells into one list of Sheets batchUpdate requests.
+
+    The sheet grid is grown first if needed, changed cells are written as runs of
+    consecutive rows per column, and the data rows are finally sorted by Total Points
+    (ties by Rank) so that row order matches the recomputed ranks.
+    """
+    requests_body = []
+    grid_rows, grid_cols = grid_size
+    n_rows, n_cols = new_size
+    if n_rows > grid_rows:
+        requests_body.append({'appendDimension': {'sheetId': sheet_id, 'dimension': 'ROWS', 'length': n_rows - grid_rows}})
+    if n_cols > grid_cols:
+        requests_body.append({'appendDimension': {'sheetId': sheet_id, 'dimension': 'COLUMNS', 'length': n_cols - grid_cols}})
+    runs = []
+    for r, c, value in sorted(changes, key=lambda change: (change[1], change[0])):
+        if runs and runs[-1]['col'] == c and runs[-1]['start'] + len(runs[-1]['values']) == r:
+            runs[-1]['values'].append(value)
+        else:
+            runs.append({'col': c, 'start': r, 'values': [value]})
+    for run in runs:
+        requests_body.append({'updateCells': {
+            'range': {
+                'sheetId': sheet_id,
+                'startRowIndex': run['start'], 'endRowIndex': run['start'] + len(run['values']),
+                'startColumnIndex': run['col'], 'endColumnIndex': run['col'] + 1,
+            },
+            'rows': [{'values': [_cell_data(value)]} for value in run['values']],
+            'fields': 'userEnteredValue',
+        }})
+    if n_rows > 2:
+        requests_body.append({'sortRange': {
+            'range': {'sheetId': sheet_id, 'startRowIndex': 1, 'endRowIndex': n_rows, 'startColumnIndex': 0, 'endColumnIndex': n_cols},
+            'sortSpecs': [
+                {'dimensionIndex': n_cols - 1, 'sortOrder': 'DESCENDING'},
+                {'dimensionIndex': 0, 'sortOrder': 'ASCENDING'},
+            ],
+        }})
+    return requests_body
+
+
+def write_leaderboard_worksheet(spreadsheet, worksheet, tournaments: dict, overwrite: bool = False) -> list:
+    """Merges the tournaments into the worksheet's values and sends the changed cells in one batchUpdate.
+
+    `worksheet` needs get_all_values(), id, row_count and col_count (a gspread
+    Worksheet or a sheets_client.WorksheetSnapshot); `spreadsheet` needs batch_update().
+    """
+    existing_values = worksheet.get_all_values()
+    merged = merge_leaderboard_grid(existing_values, tournaments, overwrite=overwrite)
+    if merged is None:
+        logging.warning("No new tournaments to add to the leaderboard.")
+        return []
+    new_grid, added_dates = merged
+    changes = diff_leaderboard_grid(existing_values, new_grid)
+    requests_body = build_leaderboard_requests(
+        worksheet.id, changes,
+        grid_size=(worksheet.row_count, worksheet.col_count),
+        new_size=(len(new_grid), len(new_grid[0])),
+    )
+    spreadsheet.batch_update({'requests': requests_body})
+    logging.info(f"Sent {len(changes)} changed cells in {len(requests_body)} batchUpdate requests.")
+    return added_dates
+
+
+def grid_points_by_date(values: list) -> dict:
+    """Reads {date: {player: total points}} from a leaderboard grid, leaving out empty and zero cells."""
+    if not values:
+        return {}
+    header = [str(col) for col in values[0]]
+    date_indexes = [(i, col) for i, col in enumerate(header) if parse_date_column(col)]
+    player_index = header.index('Player') if 'Player' in header else None
+    points = {col: {} for _, col in date_indexes}
+    for row in values[1:]:
+        if player_index is None or player_index >= len(row) or not row[player_index]:
+            continue
+        for i, col in date_indexes:
+            value = _to_int(row[i]) if i < len(row) else 0
+            if value:
+                points[col][str(row[player_index])] = value
+    return points
+
+
+def rebuild_leaderboard_worksheet(spreadsheet, worksheet, tournaments: dict, dry_run: bool = False) -> dict:
+    """Replaces the given tournaments' columns ({date: points}) and sends the whole correction in one batchUpdate.
+
+    Returns the diff_season_points report, plus 'changed_cells'. With `dry_run` nothing is written.
+    """
+    existing_values = worksheet.get_all_values()
+    report = diff_season_points(
+        grid_points_by_date(existing_values),
+        {date: {p['Player']: int(p['Total Points']) for p in points} for date, points in tournaments.items()},
+    )
+    merged = merge_leaderboard_grid(existing_values, tournaments, replace=True)
+    if merged is None:
+        report['changed_cells'] = 0
+        return report
+    new_grid, _ = merged
+    changes = diff_leaderboard_grid(existing_values, new_grid)
+    report['changed_cells'] = len(changes)
+    if dry_run or not changes:
+        return report
+    requests_body = build_leaderboard_requests(
+        worksheet.id, changes,
+        grid_size=(worksheet.row_count, worksheet.col_count),
+        new_size=(len(new_grid), len(new_grid[0])),
+    )
+    spreadsheet.batch_update({'requests': requests_body})
+    logging.info(f"Rebuilt {len(tournaments)} tournament column(s): sent {len(changes)} changed cells in {len(requests_body)} batchUpdate requests.")
+    return report
+
+
+def rebuild_leaderboard_sheet(tournaments: dict, sheet_name: str, creds, sheet_key: str | None = None, dry_run: bool = False) -> dict:
+    """Rewrites the columns of the given tournaments ({date: points}) on the leaderboard sheet in one batchUpdate."""
+    from sheets_client import get_sheets_client
+    credentials_dict = json.loads(creds) if isinstance(creds, str) else creds
+    sheet = get_sheets_client(credentials_dict).open_sheet(key=sheet_key, name=sheet_name)
+    return rebuild_leaderboard_worksheet(sheet, sheet.snapshot(), tournaments, dry_run=dry_run)
+
+
+def update_leaderboard_sheet_batch(tournaments: dict, sheet_name: str, creds, overwrite: bool = False, sheet_key: str | None = None) -> list:
+    """Merges several tournaments ({date: points}) into the leaderboard sheet and returns the written dates.
+
+    The sheet is read in one request and only the changed cells are sent, together
+    with a server-side sort, in one atomic batchUpdate call. The sheet is never
+    cleared, so readers never see it empty. With `overwrite`, existing date columns
+    are updated for the given players. `sheet_key` opens the sheet without a Drive search.
+    """
+    from sheets_client import get_sheets_client
+    logging.info(f"Connecting to Google Sheets to update '{sheet_key or sheet_name}'...")
+    try:
+        if isinstance(creds, str):
+            credentials_dict = json.loads(creds)
+        else:
+            credentials_dict = creds
+        sheet = get_sheets_client(credentials_dict).open_sheet(key=sheet_key, name=sheet_name)
+        snapshot = sheet.snapshot()
+    except Exception as e:
+        logging.error(f"Failed to connect to Google Sheets. Check credentials, sheet name, and sharing settings. Error: {e}")
+        raise
+    
+    try:
+        added_dates = write_leaderboard_worksheet(sheet, snapshot, tournaments, overwrite=overwrite)
+        if added_dates:
+            logging.info(f"Successfully updated Google Sheet '{sheet_key or sheet_name}' with {len(added_dates)} tournament(s).")
+    except Exception as e:
+        logging.error(f"Could not write to Google Sheet '{sheet_key or sheet_name}'. Error: {e}")
+        raise
+    return added_dates
+
+
+def write_leaderboard_snapshot(frame: pd.DataFrame, path: str, revision: str | None):
+    """Saves a leaderboard table and its store revision as a Feather (Arrow IPC) file, atomically."""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    table = pa.Table.from_pandas(frame.reset_index(drop=True), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SNAPSHOT_REVISION_KEY] = json.dumps(revision).encode('utf-8')
+    tmp_path = f"{path}.tmp"
+    feather.write_feather(table.replace_schema_metadata(metadata), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_leaderboard_snapshot(path: str) -> tuple | None:
+    """Returns (frame, revision) from a snapshot file, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    import pyarrow.feather as feather
+    table = feather.read_table(path)
+    revision = json.loads((table.schema.metadata or {}).get(SNAPSHOT_REVISION_KEY, b'null'))
+    return table.to_pandas(), revision
+
+
+class LeaderboardStore(ABC):
+    """
+    Interface of a leaderboard backend.
+
+    A store holds per-player points for each tournament (one tournament per date)
+    and can render them as the leaderboard table shown on the home page.
+    """
+
+    @abstractmethod
+    def load_leaderboard(self) -> pd.DataFrame:
+        """Returns the leaderboard table: Rank, Player, one column per date, Total Points."""
+
+    @abstractmethod
+    def list_tournaments(self) -> list:
+        """Returns [{'date': 'dd.mm.yyyy', 'tournament_id': int | None}, ...] in date order."""
+
+    @abstractmethod
+    def add_tournaments(self, tournaments: list) -> list:
+        """Adds processed tournaments whose date is not stored yet. Returns the added dates."""
+
+    @abstractmethod
+    def update_tournament_points(self, tournament_date: str, tournament_points: list, tournament_id: int | None = None):
+        """Upserts the given players' points for a tournament (adding the tournament if needed); other players are untouched."""
+
+    @abstractmethod
+    def replace_tournaments(self, tournaments: list, dry_run: bool = False) -> dict:
+        """
+        Replaces the points of the given processed tournaments (adding missing ones)
+        in one write, so rescored or corrected results overwrite what is stored.
+        Returns a diff_season_points report; with `dry_run` nothing is written.
+        """
+
+    def add_tournament(self, tournament_date: str, tournament_points: list, tournament_id: int | None = None) -> bool:
+        added = self.add_tournaments([{'tournament_id': tournament_id, 'date': tournament_date, 'points': tournament_points}])
+        return tournament_date in added
+
+    def has_tournament(self, tournament_date: str) -> bool:
+        return any(t['date'] == tournament_date for t in self.list_tournaments())
+
+    def revision(self) -> str | None:
+        """A cheap marker that changes whenever the leaderboard changes. None means unknown."""
+        return None
+
+
+class GoogleSheetsStore(LeaderboardStore):
+    """
+    The leaderboard Google Sheet. Only the dates are known for its tournaments, not their IDs.
+    All calls go through the process-wide, quota-limited sheets_client.SheetsClient.
+    """
+
+    def __init__(self, sheet_name: str, creds, sheet_key: str | None = None):
+        self.sheet_name = sheet_name
+        self.sheet_key = sheet_key
+        self.creds = json.loads(creds) if isinstance(creds, str) else dict(creds)
+
+    def _sheet(self):
+        from sheets_client import get_sheets_client
+        return get_sheets_client(self.creds).open_sheet(key=self.sheet_key, name=self.sheet_name)
+
+    def revision(self) -> str | None:
+        # Drive's modifiedTime is a single small metadata request
+        return self._sheet().last_update_time()
+
+    def load_leaderboard(self) -> pd.DataFrame:
+        df = pd.DataFrame(self._sheet().snapshot().get_all_records())
+        # Ensure numeric columns are numeric; the snapshot holds formatted strings
+        for col in df.columns:
+            if col != 'Player':
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        return df
+
+    def list_tournaments(self) -> list:
+        dates = []
+        for col in self._sheet().header_row():
+            if parse_date_column(col):
+                dates.append(col)
+        return [{'date': date, 'tournament_id': None} for date in sorted(dates, key=parse_date_column)]
+
+    def add_tournaments(self, tournaments: list) -> list:
+        by_date = tournaments_by_date(tournaments)
+        if not by_date:
+            logging.warning("No tournament points to write to the leaderboard.")
+            return []
+        return update_leaderboard_sheet_batch(
+            {date: t['points'] for date, t in by_date.items()}, self.sheet_name, self.creds, sheet_key=self.sheet_key
+        )
+
+    def update_tournament_points(self, tournament_date: str, tournament_points: list, tournament_id: int | None = None):
+        update_leaderboard_sheet_batch(
+            {tournament_date: tournament_points}, self.sheet_name, self.creds, overwrite=True, sheet_key=self.sheet_key
+        )
+
+    def replace_tournaments(self, tournaments: list, dry_run: bool = False) -> dict:
+        by_date = tournaments_by_date(tournaments)
+        return rebuild_leaderboard_sheet(
+            {date: t['points'] for date, t in by_date.items()}, self.sheet_name, self.creds, sheet_key=self.sheet_key, dry_run=dry_run
+        )
+
+
+class SQLiteStore(LeaderboardStore):
+    """
+    Local leaderboard database with one row per player per tournament.
+
+    Reads and ranking are local queries. If `export_store` is given (usually a
+    GoogleSheetsStore), every newly added tournament is also pushed to it.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, export_store: LeaderboardStore | None = None):
+        self.db_path = db_path
+        self.export_store = export_store
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS tournaments (
+                    date TEXT PRIMARY KEY,
+                    tournament_id INTEGER,
+                    added_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS results (
+                    date TEXT NOT NULL REFERENCES tournaments(date),
+                    player TEXT NOT NULL,
+                    wins INTEGER NOT NULL,
+                    points_from_wins INTEGER NOT NULL,
+                    points_from_ranking INTEGER NOT NULL,
+                    total_points INTEGER NOT NULL,
+                    PRIMARY KEY (date, player)
+                );
+                """
+            )
+
+    def load_leaderboard(self) -> pd.DataFrame:
+        with self._lock:
+            results = pd.read_sql_query("SELECT date, player, total_points FROM results", self._conn)
+        return build_leaderboard_frame(results)
+
+    def list_tournaments(self) -> list:
+        with self._lock:
+            rows = self._conn.execute("SELECT date, tournament_id FROM tournaments").fetchall()
+        tournaments = [{'date': date, 'tournament_id': tournament_id} for date, tournament_id in rows]
+        return sorted(tournaments, key=lambda t: parse_date_column(t['date']))
+
+    def revision(self) -> str | None:
+        with self._lock:
+            count, last_added = self._conn.execute("SELECT COUNT(*), MAX(added_at) FROM tournaments").fetchone()
+        return f"{count}:{last_added}"
+
+    def load_tournament_points(self, tournament_date: str) -> list:
+        """Returns the stored points breakdown of one tournament in the scraper's format."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT player, wins, points_from_wins, points_from_ranking, total_points FROM results WHERE date = ?",
+                (tournament_date,),
+            ).fetchall()
+        return [
+            {'Player': player, 'Number of Wins': wins, 'Points from Wins': from_wins,
+             'Points from Ranking': from_ranking, 'Total Points': total}
+            for player, wins, from_wins, from_ranking, total in rows
+        ]
+
+    def add_tournaments(self, tournaments: list) -> list:
+        by_date = tournaments_by_date(tournaments)
+        added = []
+        with self._lock, self._conn:
+            existing = {row[0] for row in self._conn.execute("SELECT date FROM tournaments")}
+            for tournament_date, tournament in by_date.items():
+                if tournament_date in existing:
+                    logging.warning(f"Tournament date {tournament_date} already exists in {self.db_path}. Skipping update.")
+                    continue
+                self._conn.execute(
+                    "INSERT INTO tournaments (date, tournament_id, added_at) VALUES (?, ?, ?)",
+                    (tournament_date, tournament.get('tournament_id'), time.time()),
+                )
+                self._conn.executemany(
+                    "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (tournament_date, p['Player'], p['Number of Wins'], p['Points from Wins'], p['Points from Ranking'], p['Total Points'])
+                        for p in tournament['points']
+                    ],
+                )
+                added.append(tournament_date)
+        if added:
+            logging.info(f"Stored {len(added)} tournament(s) in {self.db_path}.")
+            if self.export_store is not None:
+                self.export_store.add_tournaments([by_date[date] for date in added])
+        return added
+
+    def update_tournament_points(self, tournament_date: str, tournament_points: list, tournament_id: int | None = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO tournaments (date, tournament_id, added_at) VALUES (?, ?, ?)",
+                (tournament_date, tournament_id, time.time()),
+            )
+            # Bump added_at so the revision marker changes on every update
+            self._conn.execute("UPDATE tournaments SET added_at = ? WHERE date = ?", (time.time(), tournament_date))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (tournament_date, p['Player'], p['Number of Wins'], p['Points from Wins'], p['Points from Ranking'], p['Total Points'])
+                    for p in tournament_points
+                ],
+            )
+        if self.export_store is not None:
+            self.export_store.update_tournament_points(tournament_date, tournament_points, tournament_id=tournament_id)
+
+    def replace_tournaments(self, tournaments: list, dry_run: bool = False) -> dict:
+        by_date = tournaments_by_date(tournaments)
+        with self._lock, self._conn:
+            old = {}
+            for date, player, total in self._conn.execute("SELECT date, player, total_points FROM results"):
+                old.setdefault(date, {})[player] = total
+            report = diff_season_points(old, {date: {p['Player']: int(p['Total Points']) for p in t['points']} for date, t in by_date.items()})
+            if dry_run:
+                return report
+            now = time.time()
+            for tournament_date, tournament in by_date.items():
+                if tournament_date not in report['changed_dates']:
+                    continue
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tournaments (date, tournament_id, added_at) VALUES (?, ?, ?)",
+                    (tournament_date, tournament.get('tournament_id'), now),
+                )
+                self._conn.execute("DELETE FROM results WHERE date = ?", (tournament_date,))
+                self._conn.executemany(
+                    "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (tournament_date, p['Player'], p['Number of Wins'], p['Points from Wins'], p['Points from Ranking'], p['Total Points'])
+                        for p in tournament['points']
+                    ],
+                )
+        logging.info(f"Replaced {len(report['changed_dates'])} tournament(s) in {self.db_path}.")
+        if self.export_store is not None:
+            self.export_store.replace_tournaments(list(by_date.values()))
+        return report
+
+    def export_to(self, target: LeaderboardStore) -> list:
+        """Copies every local tournament that `target` does not have yet. Returns the exported dates."""
+        target_dates = {t['date'] for t in target.list_tournaments()}
+        missing = [
+            {'tournament_id': t['tournament_id'], 'date': t['date'], 'points': self.load_tournament_points(t['date'])}
+            for t in self.list_tournaments() if t['date'] not in target_dates
+        ]
+        if not missing:
+            logging.info("Export target is already up to date.")
+            return []
+        return target.add_tournaments(missing)
+
+
+class LeaderboardCache:
+    """
+    Process-wide, revision-aware cache of a store's leaderboard table.
+
+    get() always answers from memory. Once `check_interval` seconds have passed it
+    also starts a background check of the store's revision marker and reloads the
+    table only if the marker changed (stale-while-revalidate). Only the very first
+    load blocks. The update path calls refresh() right after writing, so changes
+    show up immediately instead of after a fixed TTL.
+
+    With a `snapshot_path`, every reloaded table is also saved to disk, and a cold
+    process answers its first get() from that file while the store is checked in
+    the background, so not even the first load waits for the store.
+    """
+
+    def __init__(self, store: LeaderboardStore, check_interval: float = 60, snapshot_path: str | None = None):
+        self.store = store
+        self.check_interval = check_interval
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._frame = None
+        self._revision = None
+        self._checked_at = 0.0
+        self._refreshing = False
+
+    def get(self) -> tuple:
+        """
+        Returns (frame, revision), read together, so anything derived from the
+        frame can be cached under the revision it was built from.
+        """
+        with self._lock:
+            frame, revision = self._frame, self._revision
+            due = time.time() - self._checked_at >= self.check_interval
+        if frame is None:
+            if not self._load_snapshot():
+                self.refresh(force=True)
+            with self._lock:
+                frame, revision = self._frame, self._revision
+            due = True
+        if due:
+            self._refresh_in_background()
+        return frame, revision
+
+    def refresh(self, force: bool = False) -> pd.DataFrame:
+        """Reloads the table if the store revision changed (or always, with force=True)."""
+        revision = self.store.revision()
+        with self._lock:
+            if not force and self._frame is not None and revision is not None and revision == self._revision:
+                self._checked_at = time.time()
+                return self._frame
+        frame = self.store.load_leaderboard()
+        with self._lock:
+            self._frame = frame
+            self._revision = revision
+            self._checked_at = time.time()
+        logging.info(f"Leaderboard cache refreshed (revision {revision}).")
+        if self.snapshot_path:
+            try:
+                write_leaderboard_snapshot(frame, self.snapshot_path, revision)
+            except Exception as e:
+                logging.warning(f"Could not save the leaderboard snapshot to {self.snapshot_path}: {e}")
+        return frame
+
+    def _load_snapshot(self) -> bool:
+        """Serves the on-disk snapshot until the store has been checked. Returns False if there is none."""
+        if not self.snapshot_path:
+            return False
+        try:
+            snapshot = read_leaderboard_snapshot(self.snapshot_path)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable leaderboard snapshot {self.snapshot_path}: {e}")
+            return False
+        if snapshot is None:
+            return False
+        frame, revision = snapshot
+        with self._lock:
+            if self._frame is None:
+                self._frame = frame
+                self._revision = revision
+        logging.info(f"Serving the leaderboard snapshot (revision {revision}) while the store is checked.")
+        return True
+
+    def invalidate(self):
+        """Forces the next get() to revalidate in the background."""
+        with self._lock:
+            self._checked_at = 0.0
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Background leaderboard refresh failed, serving stale data: {e}")
+                with self._lock:
+                    self._checked_at = time.time()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="leaderboard-refresh", daemon=True).start()
+
+
+def create_store(backend: str, sheet_name: str | None = None, creds=None, db_path: str = DEFAULT_DB_PATH, export_to_sheet: bool = False,
+                 sheet_key: str | None = None) -> LeaderboardStore:
+    """
+    Builds the configured backend: 'sheets' (Google Sheets only) or 'sqlite'
+    (local database, optionally exporting to the Google Sheet).
+    """
+    if backend == 'sheets':
+        if not ((sheet_name or sheet_key) and creds):
+            raise ValueError("The 'sheets' leaderboard backend needs a sheet name or key and service account credentials.")
+        return GoogleSheetsStore(sheet_name, creds, sheet_key=sheet_key)
+    if backend == 'sqlite':
+        export_store = GoogleSheetsStore(sheet_name, creds, sheet_key=sheet_key) if export_to_sheet and (sheet_name or sheet_key) and creds else None
+        return SQLiteStore(db_path, export_store=export_store)
+    raise ValueError(f"Unknown leaderboard backend '{backend}'. Use 'sheets' or 'sqlite'.")
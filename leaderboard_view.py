@@ -0,0 +1,53 @@
+# leaderboard_view.py - Paged, searchable views of the leaderboard table for the home page
+
+import math
+
+import pandas as pd
+
+from leaderboard_store import parse_date_column
+
+DEFAULT_PAGE_SIZE = 25
+
+
+class LeaderboardView:
+    """
+    The display form of one leaderboard table, built once per data revision.
+
+    The 'Ranking' labels, column order and lowercase search keys are computed
+    in the constructor; query() only filters rows, picks the date columns in
+    the requested window and slices out one page, so each rerun ships just
+    that page to the browser.
+    """
+
+    def __init__(self, leaderboard: pd.DataFrame):
+        ranking = leaderboard['Rank'].astype(str) + '. ' + leaderboard['Player'].astype(str)
+        frame = leaderboard.drop(columns=['Rank', 'Player'])
+        frame.index = pd.Index(ranking, name='Ranking')
+        self.frame = frame
+        self.search_keys = leaderboard['Player'].astype(str).str.casefold().to_numpy()
+        self.dates = [column for column in frame.columns if parse_date_column(column)]
+        self.other_columns = [column for column in frame.columns if column not in self.dates]
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def query(self, search: str = '', date_from: str | None = None, date_to: str | None = None,
+              page: int = 1, page_size: int = DEFAULT_PAGE_SIZE) -> tuple:
+        """
+        Returns (page_frame, matching_rows, page_count). Rows keep their overall
+        ranking; `search` is a case-insensitive substring of the player name and
+        `date_from`/`date_to` limit the tournament columns (the season total stays).
+        """
+        rows = self.frame
+        if search:
+            mask = pd.Series(self.search_keys).str.contains(search.casefold(), regex=False).to_numpy()
+            rows = rows[mask]
+        columns = self.dates
+        if date_from or date_to:
+            start = self.dates.index(date_from) if date_from in self.dates else 0
+            end = self.dates.index(date_to) if date_to in self.dates else len(self.dates) - 1
+            columns = self.dates[start:end + 1]
+        page_count = max(1, math.ceil(len(rows) / page_size))
+        page = min(max(1, page), page_count)
+        offset = (page - 1) * page_size
+        return rows.iloc[offset:offset + page_size][columns + self.other_columns], len(rows), page_count
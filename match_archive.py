@@ -0,0 +1,144 @@
+# match_archive.py - Columnar archive of every scraped match and final standing
+
+import logging
+import os
+import threading
+from datetime import datetime
+
+import pyarrow as pa
+
+from scoring import Match, parse_rank
+
+DEFAULT_ARCHIVE_DIR = os.environ.get("TSPOOL_ARCHIVE_DIR", "match_archive")
+
+MATCH_SCHEMA = pa.schema([
+    ('tournament_id', pa.int32()),
+    ('date', pa.date32()),
+    ('date_label', pa.string()),
+    ('match_index', pa.int32()),
+    ('player1', pa.string()),
+    ('player2', pa.string()),
+    ('score1', pa.int16()),
+    ('score2', pa.int16()),
+    ('forfeit', pa.bool_()),
+    ('walkover', pa.bool_()),
+    ('winner', pa.string()),
+])
+STANDINGS_SCHEMA = pa.schema([
+    ('tournament_id', pa.int32()),
+    ('date', pa.date32()),
+    ('date_label', pa.string()),
+    ('rank', pa.int16()),
+    ('player', pa.string()),
+])
+
+
+class MatchArchive:
+    """
+    Arrow IPC archive of scraped tournaments, partitioned by season:
+
+        <root>/season=2025/matches-848.arrow
+        <root>/season=2025/standings-848.arrow
+
+    Each tournament is one pair of files, written atomically, so re-archiving a
+    tournament replaces it. Loading memory-maps the files instead of reading
+    them into Python objects.
+    """
+
+    def __init__(self, root: str = DEFAULT_ARCHIVE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _season_dir(self, season: int) -> str:
+        return os.path.join(self.root, f"season={season}")
+
+    def seasons(self) -> list:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(int(name.split('=', 1)[1]) for name in os.listdir(self.root) if name.startswith('season='))
+
+    def _write(self, table: pa.Table, path: str):
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def add_tournament(self, tournament_id: int, tournament_date: str, matches: list, standings: list):
+        """Archives the Match records and top standings of one tournament."""
+        date = datetime.strptime(tournament_date, '%d.%m.%Y').date()
+        matches_table = pa.table({
+            'tournament_id': [tournament_id] * len(matches),
+            'date': [date] * len(matches),
+            'date_label': [tournament_date] * len(matches),
+            'match_index': list(range(len(matches))),
+            'player1': [m.player1 for m in matches],
+            'player2': [m.player2 for m in matches],
+            'score1': [m.score1 for m in matches],
+            'score2': [m.score2 for m in matches],
+            'forfeit': [m.forfeit for m in matches],
+            'walkover': [m.walkover for m in matches],
+            'winner': [m.winner for m in matches],
+        }, schema=MATCH_SCHEMA)
+        standings_table = pa.table({
+            'tournament_id': [tournament_id] * len(standings),
+            'date': [date] * len(standings),
+            'date_label': [tournament_date] * len(standings),
+            'rank': [parse_rank(s['rank']) for s in standings],
+            'player': [s['player'] for s in standings],
+        }, schema=STANDINGS_SCHEMA)
+        season_dir = self._season_dir(date.year)
+        with self._lock:
+            os.makedirs(season_dir, exist_ok=True)
+            self._write(matches_table, os.path.join(season_dir, f"matches-{tournament_id}.arrow"))
+            self._write(standings_table, os.path.join(season_dir, f"standings-{tournament_id}.arrow"))
+        logging.info(f"Archived {len(matches)} matches of tournament {tournament_id} to {season_dir}.")
+
+    def add_tournaments(self, tournaments: list):
+        """Archives processed tournaments (dicts with 'tournament_id', 'date', 'matches' and 'standings')."""
+        for tournament in tournaments:
+            if tournament.get('date') and tournament.get('matches'):
+                self.add_tournament(tournament['tournament_id'], tournament['date'], tournament['matches'], tournament['standings'])
+
+    def _load(self, prefix: str, schema: pa.Schema, seasons: list | None) -> pa.Table:
+        tables = []
+        for season in seasons if seasons is not None else self.seasons():
+            season_dir = self._season_dir(season)
+            if not os.path.isdir(season_dir):
+                continue
+            for name in sorted(os.listdir(season_dir)):
+                if name.startswith(prefix) and name.endswith('.arrow'):
+                    source = pa.memory_map(os.path.join(season_dir, name), 'r')
+                    tables.append(pa.ipc.open_file(source).read_all())
+        if not tables:
+            return schema.empty_table()
+        return pa.concat_tables(tables)
+
+    def load_matches(self, seasons: list | None = None) -> pa.Table:
+        """All archived matches of the given seasons (default: all), zero-copy from memory-mapped files."""
+        return self._load('matches-', MATCH_SCHEMA, seasons)
+
+    def load_standings(self, seasons: list | None = None) -> pa.Table:
+        return self._load('standings-', STANDINGS_SCHEMA, seasons)
+
+    def load_tournaments(self, seasons: list | None = None) -> list:
+        """
+        Rebuilds the archived tournaments as dicts with 'tournament_id', 'date',
+        'matches' (Match records) and 'standings', in date order, ready for
+        scoring.score_season.
+        """
+        tournaments = {}
+        for row in self.load_matches(seasons).to_pylist():
+            tournament = tournaments.setdefault(row['tournament_id'], {
+                'tournament_id': row['tournament_id'], 'date': row['date_label'], 'day': row['date'], 'matches': [], 'standings': [],
+            })
+            tournament['matches'].append(Match(
+                row['player1'], row['player2'], row['score1'], row['score2'], row['forfeit'], row['walkover'],
+            ))
+        for row in self.load_standings(seasons).to_pylist():
+            if row['tournament_id'] in tournaments:
+                tournaments[row['tournament_id']]['standings'].append({'rank': f"{row['rank']}.", 'player': row['player']})
+        ordered = sorted(tournaments.values(), key=lambda t: (t['day'], t['tournament_id']))
+        for tournament in ordered:
+            del tournament['day']
+        return ordered
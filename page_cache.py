@@ -0,0 +1,87 @@
+# page_cache.py - Persistent on-disk cache for tspool.fi pages
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.environ.get("TSPOOL_CACHE_DIR", ".tspool_cache")
+# Pages of tournaments that are still running are revalidated after this many seconds
+DEFAULT_TTL_SECONDS = 15 * 60
+
+
+class PageCache:
+    """
+    SQLite-backed store of fetched pages keyed by URL.
+
+    Each entry keeps the response body together with its ETag / Last-Modified
+    validators. Entries marked frozen (pages of finished tournaments) are served
+    forever; all others are considered fresh for `ttl` seconds. With `offline=True`
+    the cache never asks for a network fetch and serves stale entries as-is.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL_SECONDS, offline: bool = False):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "pages.sqlite3")
+        self.ttl = ttl
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    body TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    frozen INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+
+    def get(self, url: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at, frozen FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'body': row[0], 'etag': row[1], 'last_modified': row[2], 'fetched_at': row[3], 'frozen': bool(row[4])}
+
+    def is_fresh(self, entry: dict) -> bool:
+        return entry['frozen'] or time.time() - entry['fetched_at'] < self.ttl
+
+    def store(self, url: str, body: str, etag: str | None = None, last_modified: str | None = None):
+        with self._lock, self._conn:
+            # A frozen page stays frozen even if it is explicitly refetched
+            self._conn.execute(
+                """
+                INSERT INTO pages (url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    body = excluded.body, etag = excluded.etag,
+                    last_modified = excluded.last_modified, fetched_at = excluded.fetched_at
+                """,
+                (url, body, etag, last_modified, time.time()),
+            )
+
+    def touch(self, url: str):
+        """Marks a cached page as revalidated now (after a 304 response)."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def freeze(self, urls: list, frozen: bool = True):
+        """Marks pages as final so they are never refetched (or, with frozen=False, as live again)."""
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE pages SET frozen = ? WHERE url = ?", [(int(frozen), url) for url in urls])
+        logging.info(f"{'Froze' if frozen else 'Unfroze'} {len(urls)} cached page(s).")
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
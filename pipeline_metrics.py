@@ -0,0 +1,284 @@
+# pipeline_metrics.py - Per-stage tracing of pipeline runs, exported as JSON lines and Prometheus text
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: exports are not serialized across processes
+    fcntl = None
+
+DEFAULT_METRICS_DIR = os.environ.get("TSPOOL_METRICS_DIR", ".tspool_metrics")
+RUNS_FILE = "pipeline_runs.jsonl"
+PROMETHEUS_FILE = "pipeline_metrics.prom"
+STAGES = ('fetch', 'parse', 'score', 'sheet_read', 'sheet_write')
+
+_current_run = contextvars.ContextVar('pipeline_run', default=None)
+
+
+class StageRecord(dict):
+    """
+    One timed stage: 'stage', 'seconds', 'bytes', 'items', 'outcome' and 'error'.
+
+    outcome is 'ok', 'empty' (finished but produced no items) or 'error'; error is
+    the exception class name, so a timed-out fetch and an empty bracket differ.
+    Extra keyword labels (e.g. page='bracket') are kept as-is.
+    """
+
+    def __init__(self, stage: str, **labels):
+        super().__init__(stage=stage, seconds=0.0, bytes=None, items=None, outcome='ok', error=None)
+        self.update(labels)
+
+
+class PipelineRun:
+    """The stages recorded while one scrape -> score -> publish run was active."""
+
+    def __init__(self, kind: str, **labels):
+        self.run_id = uuid.uuid4().hex[:8]
+        self.kind = kind
+        self.labels = labels
+        self.started_at = time.time()
+        self.finished_at = None
+        self.status = 'running'
+        self.error = None
+        self.stages = []
+        self._lock = threading.Lock()
+
+    def add(self, record: StageRecord):
+        with self._lock:
+            self.stages.append(record)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            stages = [dict(record) for record in self.stages]
+        return {
+            'run_id': self.run_id, 'kind': self.kind, **self.labels,
+            'started_at': self.started_at, 'finished_at': self.finished_at,
+            'seconds': (self.finished_at or time.time()) - self.started_at,
+            'status': self.status, 'error': self.error, 'stages': stages,
+        }
+
+
+def summarize_stages(run: dict) -> dict:
+    """Per-stage totals of a run dict: {stage: {'seconds', 'bytes', 'items', 'calls', 'errors', 'empty'}}."""
+    totals = {}
+    for record in run['stages']:
+        total = totals.setdefault(record['stage'], {'seconds': 0.0, 'bytes': 0, 'items': 0, 'calls': 0, 'errors': 0, 'empty': 0})
+        total['seconds'] += record['seconds']
+        total['bytes'] += record['bytes'] or 0
+        total['items'] += record['items'] or 0
+        total['calls'] += 1
+        total['errors'] += record['outcome'] == 'error'
+        total['empty'] += record['outcome'] == 'empty'
+    return totals
+
+
+def log_run_summary(run: PipelineRun):
+    run_dict = run.to_dict()
+    logging.info(f"--- Pipeline Stages (run {run.run_id}, {run.status}, {run_dict['seconds']:.3f}s) ---")
+    for name, total in summarize_stages(run_dict).items():
+        notes = ", ".join(f"{total[key]} {key}" for key in ('errors', 'empty') if total[key])
+        logging.info(
+            f"{name:<12} | {total['seconds']:8.3f}s | {total['calls']:>4} calls | {total['bytes']:>10} B | {total['items']:>6} items"
+            + (f" | {notes}" if notes else "")
+        )
+
+
+class PipelineMetrics:
+    """
+    Collects finished runs. Each one is appended to `<metrics_dir>/pipeline_runs.jsonl`,
+    and `<metrics_dir>/pipeline_metrics.prom` is rewritten with running totals in
+    the Prometheus text format (for node_exporter's textfile collector). The totals
+    are summed from the JSON-lines file, so every process sharing the directory
+    exports the same, monotonic counters; each process only reads the lines added
+    since its last export. With metrics_dir=None runs are only kept in memory.
+    """
+
+    def __init__(self, metrics_dir: str | None = DEFAULT_METRICS_DIR, history: int = 50):
+        self.metrics_dir = metrics_dir
+        self.recent = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._reset_totals()
+
+    def _reset_totals(self):
+        self._offset = 0
+        self._stage_totals = {}
+        self._stage_errors = {}
+        self._run_counts = {}
+        self._last_finished_at = None
+
+    def _add_to_totals(self, run_dict: dict):
+        key = (run_dict['kind'], run_dict['status'])
+        self._run_counts[key] = self._run_counts.get(key, 0) + 1
+        for record in run_dict['stages']:
+            total = self._stage_totals.setdefault(record['stage'], {'seconds': 0.0, 'bytes': 0, 'items': 0, 'calls': 0})
+            total['seconds'] += record['seconds']
+            total['bytes'] += record['bytes'] or 0
+            total['items'] += record['items'] or 0
+            total['calls'] += 1
+            if record['error']:
+                error_key = (record['stage'], record['error'])
+                self._stage_errors[error_key] = self._stage_errors.get(error_key, 0) + 1
+        self._last_finished_at = max(self._last_finished_at or 0.0, run_dict['finished_at'] or 0.0)
+
+    def finish(self, run: PipelineRun):
+        run_dict = run.to_dict()
+        with self._lock:
+            self.recent.append(run_dict)
+            if not self.metrics_dir:
+                self._add_to_totals(run_dict)
+                return
+            try:
+                self._export(run_dict)
+            except OSError as e:
+                logging.warning(f"Could not write pipeline metrics to {self.metrics_dir}: {e}")
+
+    def _export(self, run_dict: dict):
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        with open(os.path.join(self.metrics_dir, RUNS_FILE), 'a+b') as f:
+            # Appending, catching up and rewriting the .prom file happen under one file lock,
+            # so a process can never overwrite the file with totals older than another's
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write((json.dumps(run_dict, ensure_ascii=False) + "\n").encode('utf-8'))
+                f.flush()
+                self._catch_up(f)
+                self._write_prometheus()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _catch_up(self, f):
+        """Adds the runs appended to the JSON-lines file (by any process) since the last call."""
+        size = f.seek(0, os.SEEK_END)
+        if size < self._offset:
+            # The file was truncated or rotated; its counters start over
+            self._reset_totals()
+        f.seek(self._offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            self._offset += len(line)
+            try:
+                self._add_to_totals(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    def _write_prometheus(self):
+        lines = [
+            "# HELP tspool_stage_seconds_total Time spent in each pipeline stage.",
+            "# TYPE tspool_stage_seconds_total counter",
+        ]
+        lines += [f'tspool_stage_seconds_total{{stage="{stage}"}} {t["seconds"]:.6f}' for stage, t in sorted(self._stage_totals.items())]
+        for name, key, help_text in (
+            ('tspool_stage_calls_total', 'calls', "Number of times each pipeline stage ran."),
+            ('tspool_stage_bytes_total', 'bytes', "Bytes fetched, parsed or written by each stage."),
+            ('tspool_stage_items_total', 'items', "Pages, matches, players or rows handled by each stage."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [f'{name}{{stage="{stage}"}} {t[key]}' for stage, t in sorted(self._stage_totals.items())]
+        lines += ["# HELP tspool_stage_errors_total Stage failures by exception class.", "# TYPE tspool_stage_errors_total counter"]
+        lines += [f'tspool_stage_errors_total{{stage="{stage}",error="{error}"}} {count}' for (stage, error), count in sorted(self._stage_errors.items())]
+        lines += ["# HELP tspool_runs_total Finished pipeline runs by kind and status.", "# TYPE tspool_runs_total counter"]
+        lines += [f'tspool_runs_total{{kind="{kind}",status="{status}"}} {count}' for (kind, status), count in sorted(self._run_counts.items())]
+        lines += ["# HELP tspool_last_run_timestamp_seconds End time of the last finished run.", "# TYPE tspool_last_run_timestamp_seconds gauge"]
+        lines.append(f"tspool_last_run_timestamp_seconds {self._last_finished_at or time.time():.3f}")
+        path = os.path.join(self.metrics_dir, PROMETHEUS_FILE)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(f"{path}.tmp", path)
+
+    def load_runs(self, limit: int = 20) -> list:
+        """The last `limit` runs from the JSON-lines file (runs of other processes included), newest first."""
+        path = os.path.join(self.metrics_dir, RUNS_FILE) if self.metrics_dir else None
+        if not path or not os.path.exists(path):
+            with self._lock:
+                return list(reversed(self.recent))[:limit]
+        with open(path, encoding='utf-8') as f:
+            lines = deque(f, maxlen=limit)
+        runs = []
+        for line in reversed(lines):
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                continue
+        return runs
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def configure_metrics(metrics_dir: str | None = DEFAULT_METRICS_DIR) -> PipelineMetrics:
+    """Sets where finished runs are exported (None keeps them in memory only)."""
+    global _metrics
+    with _metrics_lock:
+        _metrics = PipelineMetrics(metrics_dir)
+        return _metrics
+
+
+def get_metrics() -> PipelineMetrics:
+    """Returns the process-wide collector, writing to DEFAULT_METRICS_DIR unless configured otherwise."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = PipelineMetrics()
+        return _metrics
+
+
+@contextmanager
+def pipeline_run(kind: str, **labels):
+    """
+    Traces one run. Stages recorded in this context, including work submitted with
+    contextvars.copy_context().run, are attached to it. The run is exported when the
+    block ends; an escaping exception marks it 'error', a recorded stage error 'partial'.
+    """
+    run = PipelineRun(kind, **labels)
+    token = _current_run.set(run)
+    try:
+        yield run
+        run.status = 'partial' if any(record['error'] for record in run.stages) else 'ok'
+    except BaseException as e:
+        run.status = 'error'
+        run.error = type(e).__name__
+        raise
+    finally:
+        _current_run.reset(token)
+        run.finished_at = time.time()
+        get_metrics().finish(run)
+
+
+def current_run() -> PipelineRun | None:
+    return _current_run.get()
+
+
+@contextmanager
+def stage(name: str, **labels):
+    """
+    Times a stage of the current run and yields its StageRecord, on which the
+    caller sets 'bytes' and 'items'. Exceptions are recorded and re-raised.
+    Outside a run nothing is recorded.
+    """
+    record = StageRecord(name, **labels)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record['outcome'] = 'error'
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        if record['outcome'] == 'ok' and record['items'] == 0:
+            record['outcome'] = 'empty'
+        run = _current_run.get()
+        if run is not None:
+            run.add(record)
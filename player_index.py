@@ -0,0 +1,177 @@
+# player_index.py - Persistent head-to-head records and Elo ratings across the season
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_INDEX_PATH = os.environ.get("TSPOOL_INDEX_PATH", "player_index.sqlite3")
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / 400.0))
+
+
+def rated_results(matches: list) -> list:
+    """(winner, loser) pairs of the matches both players actually played, in bracket order.
+
+    Forfeits, walkovers and unplayed pairings are left out, so they move neither
+    the head-to-head records nor the ratings.
+    """
+    results = []
+    for match in matches:
+        if match.forfeit or match.walkover:
+            continue
+        winner = match.winner
+        if winner is None:
+            continue
+        loser = match.player2 if winner == match.player1 else match.player1
+        results.append((winner, loser))
+    return results
+
+
+class PlayerIndex:
+    """
+    SQLite index of per-pair win/loss counts and an Elo rating per player.
+
+    Tournaments are applied once each (keyed by tournament ID), touching only the
+    rows of the players in that tournament's matches, so adding one costs
+    O(matches) regardless of season length. Ratings assume tournaments are added
+    in date order; `rebuild` replays a whole season when they were not.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH, k_factor: float = K_FACTOR):
+        self.db_path = db_path
+        self.k_factor = k_factor
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS indexed_tournaments (
+                    tournament_id INTEGER PRIMARY KEY,
+                    date TEXT,
+                    added_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS ratings (
+                    player TEXT PRIMARY KEY,
+                    rating REAL NOT NULL,
+                    wins INTEGER NOT NULL,
+                    losses INTEGER NOT NULL,
+                    tournaments INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS head_to_head (
+                    player TEXT NOT NULL,
+                    opponent TEXT NOT NULL,
+                    wins INTEGER NOT NULL,
+                    losses INTEGER NOT NULL,
+                    PRIMARY KEY (player, opponent)
+                );
+                """
+            )
+
+    def has_tournament(self, tournament_id: int) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM indexed_tournaments WHERE tournament_id = ?", (tournament_id,)).fetchone()
+        return row is not None
+
+    def add_tournament(self, tournament_id: int, tournament_date: str | None, matches: list) -> bool:
+        """Applies one tournament's matches. Returns False if it was already indexed."""
+        results = rated_results(matches)
+        players = {player for pair in results for player in pair}
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM indexed_tournaments WHERE tournament_id = ?", (tournament_id,)).fetchone():
+                logging.info(f"Tournament {tournament_id} is already in the player index. Skipping.")
+                return False
+            self._conn.execute(
+                "INSERT INTO indexed_tournaments (tournament_id, date, added_at) VALUES (?, ?, ?)",
+                (tournament_id, tournament_date, time.time()),
+            )
+            if not results:
+                return True
+            placeholders = ",".join("?" * len(players))
+            rows = self._conn.execute(
+                f"SELECT player, rating, wins, losses, tournaments FROM ratings WHERE player IN ({placeholders})",
+                list(players),
+            ).fetchall()
+            ratings = {player: [rating, wins, losses, tournaments + 1] for player, rating, wins, losses, tournaments in rows}
+            for player in players - ratings.keys():
+                ratings[player] = [INITIAL_RATING, 0, 0, 1]
+            pairs = {}
+            for winner, loser in results:
+                change = self.k_factor * (1.0 - expected_score(ratings[winner][0], ratings[loser][0]))
+                ratings[winner][0] += change
+                ratings[loser][0] -= change
+                ratings[winner][1] += 1
+                ratings[loser][2] += 1
+                pairs.setdefault((winner, loser), [0, 0])[0] += 1
+                pairs.setdefault((loser, winner), [0, 0])[1] += 1
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ratings VALUES (?, ?, ?, ?, ?)",
+                [(player, *values) for player, values in ratings.items()],
+            )
+            self._conn.executemany(
+                """
+                INSERT INTO head_to_head VALUES (?, ?, ?, ?)
+                ON CONFLICT (player, opponent) DO UPDATE SET wins = wins + excluded.wins, losses = losses + excluded.losses
+                """,
+                [(player, opponent, wins, losses) for (player, opponent), (wins, losses) in pairs.items()],
+            )
+        logging.info(f"Indexed {len(results)} rated matches of tournament {tournament_id}.")
+        return True
+
+    def add_tournaments(self, tournaments: list) -> int:
+        """Indexes processed tournaments (dicts with 'tournament_id', 'date' and 'matches'). Returns how many were new."""
+        return sum(
+            self.add_tournament(t['tournament_id'], t.get('date'), t['matches'])
+            for t in tournaments if t.get('matches')
+        )
+
+    def rebuild(self, tournaments: list) -> int:
+        """Clears the index and replays `tournaments`, which must be in date order (e.g. MatchArchive.load_tournaments())."""
+        with self._lock, self._conn:
+            self._conn.executescript("DELETE FROM indexed_tournaments; DELETE FROM ratings; DELETE FROM head_to_head;")
+        return self.add_tournaments(tournaments)
+
+    def players(self) -> list:
+        with self._lock:
+            rows = self._conn.execute("SELECT player FROM ratings ORDER BY player COLLATE NOCASE").fetchall()
+        return [row[0] for row in rows]
+
+    def profile(self, player: str) -> dict | None:
+        """Rating, rating rank, match record and head-to-head records of one player."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT rating, wins, losses, tournaments FROM ratings WHERE player = ?", (player,),
+            ).fetchone()
+            if row is None:
+                return None
+            rating, wins, losses, tournaments = row
+            (better,) = self._conn.execute("SELECT COUNT(*) FROM ratings WHERE rating > ?", (rating,)).fetchone()
+            head_to_head = self._conn.execute(
+                """
+                SELECT h.opponent, h.wins, h.losses, r.rating FROM head_to_head h
+                LEFT JOIN ratings r ON r.player = h.opponent
+                WHERE h.player = ? ORDER BY h.wins + h.losses DESC, h.opponent
+                """,
+                (player,),
+            ).fetchall()
+        return {
+            'player': player,
+            'rating': rating,
+            'rating_rank': better + 1,
+            'wins': wins,
+            'losses': losses,
+            'tournaments': tournaments,
+            'head_to_head': [
+                {'Opponent': opponent, 'Wins': w, 'Losses': l, 'Opponent Rating': round(opponent_rating or INITIAL_RATING)}
+                for opponent, w, l, opponent_rating in head_to_head
+            ],
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,192 @@
+# scoring.py - Season scoring engine over a player x tournament matrix
+
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class Match(NamedTuple):
+    """A completed bracket match. Non-numeric score cells (e.g. in forfeits) are stored as 0."""
+    player1: str
+    player2: str
+    score1: int
+    score2: int
+    forfeit: bool  # one of the players is marked 'FF '
+    walkover: bool  # one side of the pairing is 'WO'
+
+    @property
+    def winner(self) -> str | None:
+        """The player credited with the win, or None for draws, unplayed and walkover matches."""
+        if self.player1.startswith('FF '):
+            winner = self.player2
+        elif self.player2.startswith('FF '):
+            winner = self.player1
+        elif self.score1 > self.score2:
+            winner = self.player1
+        elif self.score2 > self.score1:
+            winner = self.player2
+        else:
+            return None
+        return None if winner.upper() == 'WO' else winner
+
+    @property
+    def participants(self) -> list:
+        """The real players of the match, leaving out 'WO' placeholders and forfeited players."""
+        return [p for p in (self.player1, self.player2) if p.upper() != 'WO' and not p.startswith('FF ')]
+
+
+@dataclass(frozen=True)
+class ScoringRules:
+    """
+    Point rules of the weekly tournaments.
+
+    Every participant gets `participation_points`, plus `points_per_win` for each
+    match won, plus `placement_points[rank]` for a top finish.
+    """
+    participation_points: int = 30
+    points_per_win: int = 5
+    placement_points: dict = field(default_factory=lambda: {1: 2, 2: 3, 3: 4})
+
+    @classmethod
+    def from_dict(cls, rules: dict) -> 'ScoringRules':
+        """Builds rules from e.g. JSON: {"participation_points": 30, "placement_points": {"1": 2}}."""
+        defaults = cls()
+        placement = {int(rank): int(points) for rank, points in rules.get('placement_points', defaults.placement_points).items()}
+        invalid = sorted(rank for rank in placement if rank < 1)
+        if invalid:
+            # Slot 0 of the placement table means "no placement", and negative ranks would index from its end
+            raise ValueError(f"Placement ranks must be 1 or higher, got {', '.join(map(str, invalid))}.")
+        return cls(
+            participation_points=int(rules.get('participation_points', defaults.participation_points)),
+            points_per_win=int(rules.get('points_per_win', defaults.points_per_win)),
+            placement_points=placement,
+        )
+
+    def placement_table(self, max_rank: int) -> np.ndarray:
+        """Lookup array indexed by rank (0 = no placement)."""
+        table = np.zeros(max(max_rank, max(self.placement_points, default=0)) + 1, dtype=np.int64)
+        for rank, points in self.placement_points.items():
+            table[rank] = points
+        return table
+
+
+DEFAULT_RULES = ScoringRules()
+
+
+def parse_rank(rank: str) -> int:
+    """'1.' -> 1. Returns 0 for anything that is not a rank."""
+    rank = str(rank).strip().rstrip('.')
+    return int(rank) if rank.isdigit() else 0
+
+
+@dataclass
+class SeasonScores:
+    """
+    Scores of many tournaments as player x tournament integer arrays.
+    Row i belongs to players[i], column j to tournaments[j].
+    """
+    players: list
+    tournaments: list
+    participation: np.ndarray
+    wins: np.ndarray
+    placement: np.ndarray
+    win_points: np.ndarray
+    placement_points: np.ndarray
+    points: np.ndarray
+    totals: np.ndarray
+    ranks: np.ndarray
+
+    def tournament_points(self, j: int) -> list:
+        """The points breakdown of tournament j in the format of calculate_tournament_points."""
+        rows = np.flatnonzero(self.participation[:, j])
+        return [
+            {
+                'Player': self.players[i],
+                'Number of Wins': int(self.wins[i, j]),
+                'Points from Wins': int(self.win_points[i, j]),
+                'Points from Ranking': int(self.placement_points[i, j]),
+                'Total Points': int(self.points[i, j]),
+            }
+            for i in rows
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        """The leaderboard table: Rank, Player, one column per tournament, Total Points, ordered by rank."""
+        df = pd.DataFrame(self.points, columns=self.tournaments)
+        df.insert(0, 'Player', self.players)
+        df.insert(0, 'Rank', self.ranks)
+        df['Total Points'] = self.totals
+        return df.sort_values(by='Rank').reset_index(drop=True)
+
+
+def score_season(tournaments: list, rules: ScoringRules = DEFAULT_RULES) -> SeasonScores:
+    """
+    Scores many tournaments at once.
+
+    `tournaments` are dicts with 'date', 'matches' (Match records) and 'standings'.
+    The records are encoded once into integer player/tournament indices; points,
+    totals and ranks are then computed with array operations, so re-scoring a
+    season under different rules only repeats the cheap vectorized part.
+    """
+    player_index = {}
+    participant_rows, participant_cols = [], []
+    winner_rows, winner_cols = [], []
+    placed_rows, placed_cols, placed_ranks = [], [], []
+    for j, tournament in enumerate(tournaments):
+        for match in tournament['matches']:
+            for player in match.participants:
+                participant_rows.append(player_index.setdefault(player, len(player_index)))
+                participant_cols.append(j)
+            winner = match.winner
+            if winner:
+                winner_rows.append(player_index.setdefault(winner, len(player_index)))
+                winner_cols.append(j)
+        for standing in tournament['standings']:
+            rank = parse_rank(standing['rank'])
+            if rank and standing['player'] in player_index:
+                placed_rows.append(player_index[standing['player']])
+                placed_cols.append(j)
+                placed_ranks.append(rank)
+
+    shape = (len(player_index), len(tournaments))
+    participation = np.zeros(shape, dtype=bool)
+    participation[participant_rows, participant_cols] = True
+    wins = np.zeros(shape, dtype=np.int64)
+    np.add.at(wins, (winner_rows, winner_cols), 1)
+    placement = np.zeros(shape, dtype=np.int64)
+    # Only the first listed rank of a player counts, as in calculate_tournament_points
+    for i, j, rank in zip(placed_rows, placed_cols, placed_ranks):
+        if not placement[i, j]:
+            placement[i, j] = rank
+    return apply_rules(list(player_index), [t['date'] for t in tournaments], participation, wins, placement, rules)
+
+
+def apply_rules(players: list, tournaments: list, participation: np.ndarray, wins: np.ndarray, placement: np.ndarray, rules: ScoringRules = DEFAULT_RULES) -> SeasonScores:
+    """Computes points, totals and ranks from the encoded participation, win and placement arrays."""
+    wins = np.where(participation, wins, 0)
+    win_points = wins * rules.points_per_win
+    placement_points = np.where(participation, rules.placement_table(int(placement.max(initial=0)))[placement], 0)
+    points = participation * rules.participation_points + win_points + placement_points
+    totals = points.sum(axis=1)
+    order = np.argsort(-totals, kind='stable')
+    ranks = np.empty(len(players), dtype=np.int64)
+    ranks[order] = np.arange(1, len(players) + 1)
+    return SeasonScores(
+        players=players,
+        tournaments=tournaments,
+        participation=participation,
+        wins=wins,
+        placement=placement,
+        win_points=win_points,
+        placement_points=placement_points,
+        points=points,
+        totals=totals,
+        ranks=ranks,
+    )
+
+
+def rescore(scores: SeasonScores, rules: ScoringRules) -> SeasonScores:
+    """Re-applies a new rule table to already encoded season scores."""
+    return apply_rules(scores.players, scores.tournaments, scores.participation, scores.wins, scores.placement, rules)
@@ -0,0 +1,175 @@
+# sheets_client.py - Shared, quota-aware Google Sheets access
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+import gspread
+
+from pipeline_metrics import stage
+
+# Google Sheets API default quota: 60 read and 60 write requests per minute per user
+DEFAULT_REQUESTS_PER_MINUTE = 60
+MAX_QUOTA_RETRIES = 5
+QUOTA_BACKOFF_SECONDS = 2.0
+
+
+class SlidingWindowLimiter:
+    """
+    Blocking rate limiter: at most `limit` calls in any rolling `window` seconds.
+    Unlike a full token bucket it never lets a burst exceed the per-minute quota.
+    """
+
+    def __init__(self, limit: int, window: float = 60.0):
+        self.limit = max(1, int(limit))
+        self.window = window
+        self.calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= self.window:
+                    self.calls.popleft()
+                if len(self.calls) < self.limit:
+                    self.calls.append(now)
+                    return
+                wait = self.window - (now - self.calls[0])
+            time.sleep(wait)
+
+
+class WorksheetSnapshot:
+    """Grid size and values of a worksheet, read together in one request."""
+
+    def __init__(self, sheet_id: int, title: str, row_count: int, col_count: int, values: list):
+        self.id = sheet_id
+        self.title = title
+        self.row_count = row_count
+        self.col_count = col_count
+        self.values = values
+
+    def get_all_values(self) -> list:
+        return [list(row) for row in self.values]
+
+    def get_all_records(self) -> list:
+        if not self.values:
+            return []
+        header = self.values[0]
+        return [dict(zip(header, row)) for row in self.values[1:]]
+
+
+class LeaderboardSheet:
+    """The first worksheet of a spreadsheet, read and written through a SheetsClient."""
+
+    def __init__(self, client: 'SheetsClient', spreadsheet):
+        self.client = client
+        self.spreadsheet = spreadsheet
+
+    def snapshot(self) -> WorksheetSnapshot:
+        """Reads grid properties and all formatted values of the first worksheet in one request."""
+        with stage('sheet_read', call='snapshot', items=0) as record:
+            metadata = self.client.read(
+                self.spreadsheet.fetch_sheet_metadata,
+                params={
+                    'includeGridData': 'true',
+                    'fields': 'sheets(properties(sheetId,title,gridProperties),data(rowData(values(formattedValue))))',
+                },
+            )
+            record['items'] = len(metadata['sheets'][0].get('data', [{}])[0].get('rowData', []))
+        sheet = metadata['sheets'][0]
+        properties = sheet['properties']
+        values = []
+        for row in sheet.get('data', [{}])[0].get('rowData', []):
+            values.append([cell.get('formattedValue', '') for cell in row.get('values', [])])
+        while values and not any(values[-1]):
+            values.pop()
+        width = max((len(row) for row in values), default=0)
+        values = [row + [''] * (width - len(row)) for row in values]
+        return WorksheetSnapshot(
+            properties['sheetId'], properties['title'],
+            properties['gridProperties']['rowCount'], properties['gridProperties']['columnCount'],
+            values,
+        )
+
+    def header_row(self) -> list:
+        with stage('sheet_read', call='header_row') as record:
+            response = self.client.read(self.spreadsheet.values_get, '1:1')
+            rows = response.get('values', [])
+            record['items'] = len(rows[0]) if rows else 0
+        return rows[0] if rows else []
+
+    def batch_update(self, body: dict) -> dict:
+        with stage('sheet_write', call='batch_update', items=len(body.get('requests', []))) as record:
+            record['bytes'] = len(json.dumps(body).encode('utf-8'))
+            return self.client.write(self.spreadsheet.batch_update, body)
+
+    def last_update_time(self) -> str:
+        with stage('sheet_read', call='last_update_time', items=1):
+            return self.client.read(self.spreadsheet.get_lastUpdateTime)
+
+
+class SheetsClient:
+    """
+    One authenticated gspread client per service account, shared by the whole process.
+
+    Opened spreadsheets are kept, so authentication and the by-name file lookup
+    happen once. Every API call goes through a read or write limiter that keeps any
+    rolling minute within the quota, and 429 responses are retried with exponential backoff.
+    """
+
+    def __init__(self, creds: dict, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE):
+        self.gc = gspread.service_account_from_dict(creds)
+        self.read_limiter = SlidingWindowLimiter(requests_per_minute)
+        self.write_limiter = SlidingWindowLimiter(requests_per_minute)
+        self._sheets = {}
+        self._lock = threading.Lock()
+
+    def _call(self, limiter: SlidingWindowLimiter, func, *args, **kwargs):
+        for attempt in range(MAX_QUOTA_RETRIES + 1):
+            limiter.acquire()
+            try:
+                return func(*args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                if e.code != 429 or attempt == MAX_QUOTA_RETRIES:
+                    raise
+                delay = QUOTA_BACKOFF_SECONDS * (2 ** attempt)
+                logging.warning(f"Google Sheets quota exceeded. Retrying in {delay:.0f}s ({attempt + 1}/{MAX_QUOTA_RETRIES})...")
+                time.sleep(delay)
+
+    def read(self, func, *args, **kwargs):
+        return self._call(self.read_limiter, func, *args, **kwargs)
+
+    def write(self, func, *args, **kwargs):
+        return self._call(self.write_limiter, func, *args, **kwargs)
+
+    def open_sheet(self, key: str | None = None, name: str | None = None) -> LeaderboardSheet:
+        """Opens a spreadsheet by key (preferred; no Drive search) or by name, once per process."""
+        if not (key or name):
+            raise ValueError("A spreadsheet key or name is required.")
+        cache_key = ('key', key) if key else ('name', name)
+        with self._lock:
+            sheet = self._sheets.get(cache_key)
+            if sheet is None:
+                spreadsheet = self.read(self.gc.open_by_key, key) if key else self.read(self.gc.open, name)
+                sheet = LeaderboardSheet(self, spreadsheet)
+                self._sheets[cache_key] = sheet
+                self._sheets[('key', spreadsheet.id)] = sheet
+            return sheet
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_sheets_client(creds: dict, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE) -> SheetsClient:
+    """Returns the process-wide client of a service account, creating it on first use."""
+    account = creds.get('client_email', '')
+    with _clients_lock:
+        client = _clients.get(account)
+        if client is None:
+            client = SheetsClient(creds, requests_per_minute=requests_per_minute)
+            _clients[account] = client
+        return client
@@ -0,0 +1,128 @@
+# tests/test_bracket_follower.py - Incremental live scoring against a full rescoring of each snapshot
+
+import re
+
+import pytest
+
+import tournament_scraper
+from benchmarks.fixtures import synthetic_tournament
+from leaderboard_store import SQLiteStore
+from pipeline_metrics import configure_metrics
+from tournament_scraper import BracketFollower, MATCH_CELL_PATTERN
+
+SCORES_PATTERN = re.compile(r'(<div class="home-score[^"]*">)(\d+)(</div><div class="away-score[^"]*">)(\d+)(</div>)')
+
+
+@pytest.fixture(scope='module')
+def tournament():
+    pages = synthetic_tournament(16, seed=7, unplayed_ratio=0.0)
+    return {
+        'cells': MATCH_CELL_PATTERN.findall(pages['bracket']),
+        'standings': tournament_scraper.parse_final_standings(pages['results']),
+        'pages': pages,
+    }
+
+
+def bracket(cells: list) -> str:
+    return '<table class="table bracket"><tr>' + ''.join(cells) + '</tr></table>'
+
+
+def unplayed(cell: str) -> str:
+    return SCORES_PATTERN.sub('', cell)
+
+
+def corrected(cell: str) -> str:
+    """The same match with its result reversed."""
+    return SCORES_PATTERN.sub(lambda m: m[1] + m[4] + m[3] + m[2] + m[5], cell)
+
+
+def full_points(html: str, standings: list) -> dict:
+    matches = tournament_scraper.parse_match_data(html)
+    points = tournament_scraper.calculate_tournament_points(matches, tournament_scraper.calculate_win_counts(matches), standings)
+    return {entry['Player']: entry for entry in points}
+
+
+def apply_snapshot(follower: BracketFollower, published: dict, html: str, standings: list) -> dict:
+    """Feeds one snapshot, folds the pending changes into `published` and checks both against a full rescoring."""
+    follower.update_bracket(html)
+    follower.update_standings(standings)
+    for entry in follower.pending_changes():
+        published[entry['Player']] = entry['Total Points']
+    expected = full_points(html, standings)
+    assert {entry['Player']: entry for entry in follower.points()} == expected
+    assert {player: total for player, total in published.items() if total} == {player: e['Total Points'] for player, e in expected.items()}
+    return expected
+
+
+def played_cell_indexes(cells: list) -> list:
+    return [i for i, cell in enumerate(cells) if SCORES_PATTERN.search(cell) and 'WO' not in cell and 'FF ' not in cell]
+
+
+def test_progressive_snapshots_match_full_scoring(tournament):
+    cells = tournament['cells']
+    follower, published = BracketFollower(), {}
+    for played in range(0, len(cells) + 1, 5):
+        snapshot = cells[:played] + [unplayed(cell) for cell in cells[played:]]
+        apply_snapshot(follower, published, bracket(snapshot), [])
+    apply_snapshot(follower, published, bracket(cells), tournament['standings'])
+    assert follower.unplayed == 0
+    assert follower.is_finished
+
+
+def test_unchanged_snapshot_has_no_pending_changes(tournament):
+    follower, published = BracketFollower(), {}
+    apply_snapshot(follower, published, bracket(tournament['cells']), tournament['standings'])
+    assert follower.update_bracket(bracket(tournament['cells'])) == 0
+    assert follower.pending_changes() == []
+
+
+def test_corrected_result_moves_the_win(tournament):
+    cells = list(tournament['cells'])
+    follower, published = BracketFollower(), {}
+    apply_snapshot(follower, published, bracket(cells), [])
+    index = played_cell_indexes(cells)[0]
+    cells[index] = corrected(cells[index])
+    assert follower.update_bracket(bracket(cells)) == 1
+    follower.update_standings([])
+    changes = follower.pending_changes()
+    assert len(changes) == 2
+    expected = full_points(bracket(cells), [])
+    for entry in changes:
+        published[entry['Player']] = entry['Total Points']
+        assert entry == expected[entry['Player']]
+
+
+def test_shrunk_bracket_zeroes_players_without_matches(tournament):
+    cells = tournament['cells']
+    follower, published = BracketFollower(), {}
+    apply_snapshot(follower, published, bracket(cells), [])
+    kept = cells[:2]
+    expected = apply_snapshot(follower, published, bracket(kept), [])
+    dropped = {player for player in published if player not in expected}
+    assert dropped
+    assert all(published[player] == 0 for player in dropped)
+
+
+def test_no_played_match_is_not_finished(tournament):
+    follower = BracketFollower()
+    follower.update_bracket(bracket([unplayed(cell) for cell in tournament['cells']]))
+    follower.update_standings(tournament['standings'])
+    assert follower.matches == []
+    assert not follower.is_finished
+
+
+def test_follow_tournament_publishes_the_final_points(tmp_path, tournament):
+    configure_metrics(None)
+    cache = tournament_scraper.configure_page_cache(str(tmp_path / 'cache'), offline=True)
+    try:
+        for key, url in tournament_scraper.tournament_page_urls(848).items():
+            cache.store(url, tournament['pages'][key])
+        store = SQLiteStore(str(tmp_path / 'leaderboard.sqlite3'))
+        follower = tournament_scraper.follow_tournament(848, store, interval=0, max_polls=1)
+        assert follower.is_finished
+        assert cache.get(tournament_scraper.tournament_page_urls(848)['bracket'])['frozen']
+        expected = full_points(tournament['pages']['bracket'], tournament['standings'])
+        stored = {entry['Player']: entry for entry in store.load_tournament_points(follower.tournament_date)}
+        assert stored == expected
+    finally:
+        tournament_scraper.configure_page_cache(None)
@@ -0,0 +1,104 @@
+# tests/test_leaderboard_grid.py - Leaderboard sheet writes, applied to an in-memory sheet
+
+from benchmarks.fake_sheets import FakeSpreadsheet, FakeWorksheet
+from leaderboard_store import rebuild_leaderboard_worksheet, write_leaderboard_worksheet
+
+HEADER = ['Rank', 'Player', '05.10.2025', 'Total Points']
+
+
+def points(**totals) -> list:
+    return [{'Player': player, 'Total Points': total} for player, total in totals.items()]
+
+
+def sheet(values: list | None = None) -> tuple:
+    worksheet = FakeWorksheet(values)
+    return FakeSpreadsheet(worksheet), worksheet
+
+
+def grid(worksheet: FakeWorksheet) -> list:
+    """The sheet's values without the rows a write has blanked out."""
+    return [row for row in worksheet.get_all_values() if any(row)]
+
+
+def first_season_sheet() -> tuple:
+    spreadsheet, worksheet = sheet()
+    write_leaderboard_worksheet(spreadsheet, worksheet, {'05.10.2025': points(Aino=40, Bertta=35)})
+    return sheet(worksheet.get_all_values())
+
+
+def test_first_write_creates_the_leaderboard():
+    spreadsheet, worksheet = sheet()
+    added = write_leaderboard_worksheet(spreadsheet, worksheet, {'05.10.2025': points(Aino=40, Bertta=35)})
+    assert added == ['05.10.2025']
+    assert spreadsheet.batch_update_calls == 1
+    assert grid(worksheet) == [
+        HEADER,
+        ['1', 'Aino', '40', '40'],
+        ['2', 'Bertta', '35', '35'],
+    ]
+
+
+def test_new_date_is_appended_and_rows_reranked():
+    spreadsheet, worksheet = first_season_sheet()
+    added = write_leaderboard_worksheet(spreadsheet, worksheet, {'12.10.2025': points(Bertta=45, Cecilia=30)})
+    assert added == ['12.10.2025']
+    assert grid(worksheet) == [
+        ['Rank', 'Player', '05.10.2025', '12.10.2025', 'Total Points'],
+        ['1', 'Bertta', '35', '45', '80'],
+        ['2', 'Aino', '40', '0', '40'],
+        ['3', 'Cecilia', '0', '30', '30'],
+    ]
+
+
+def test_backfilled_older_date_shifts_later_columns():
+    spreadsheet, worksheet = first_season_sheet()
+    added = write_leaderboard_worksheet(spreadsheet, worksheet, {'28.09.2025': points(Aino=30, Cecilia=50)})
+    assert added == ['28.09.2025']
+    assert grid(worksheet) == [
+        ['Rank', 'Player', '28.09.2025', '05.10.2025', 'Total Points'],
+        ['1', 'Aino', '30', '40', '70'],
+        ['2', 'Cecilia', '50', '0', '50'],
+        ['3', 'Bertta', '0', '35', '35'],
+    ]
+
+
+def test_existing_date_is_skipped_without_overwrite():
+    spreadsheet, worksheet = first_season_sheet()
+    before = worksheet.get_all_values()
+    assert write_leaderboard_worksheet(spreadsheet, worksheet, {'05.10.2025': points(Bertta=50)}) == []
+    assert spreadsheet.batch_update_calls == 0
+    assert worksheet.get_all_values() == before
+
+
+def test_overwrite_updates_only_the_given_players():
+    spreadsheet, worksheet = first_season_sheet()
+    added = write_leaderboard_worksheet(spreadsheet, worksheet, {'05.10.2025': points(Bertta=50)}, overwrite=True)
+    assert added == ['05.10.2025']
+    assert grid(worksheet) == [
+        HEADER,
+        ['1', 'Bertta', '50', '50'],
+        ['2', 'Aino', '40', '40'],
+    ]
+
+
+def test_replace_rewrites_the_column_and_drops_players_without_points():
+    spreadsheet, worksheet = first_season_sheet()
+    report = rebuild_leaderboard_worksheet(spreadsheet, worksheet, {'05.10.2025': points(Aino=40, Bertha=35)})
+    assert report['changed_dates'] == ['05.10.2025']
+    assert report['total_changes'] == [
+        {'Player': 'Bertha', 'Before': 0, 'After': 35},
+        {'Player': 'Bertta', 'Before': 35, 'After': 0},
+    ]
+    assert grid(worksheet) == [
+        HEADER,
+        ['1', 'Aino', '40', '40'],
+        ['2', 'Bertha', '35', '35'],
+    ]
+
+
+def test_replace_dry_run_writes_nothing():
+    spreadsheet, worksheet = first_season_sheet()
+    report = rebuild_leaderboard_worksheet(spreadsheet, worksheet, {'05.10.2025': points(Aino=45, Bertta=35)}, dry_run=True)
+    assert report['changed_dates'] == ['05.10.2025']
+    assert report['changed_cells'] > 0
+    assert spreadsheet.batch_update_calls == 0
@@ -0,0 +1,55 @@
+# tests/test_rebuild_season.py - Season rebuilds from the match archive
+
+import pytest
+
+import tournament_scraper
+from benchmarks.fixtures import synthetic_tournament
+from leaderboard_store import SQLiteStore
+from match_archive import MatchArchive
+from pipeline_metrics import configure_metrics
+from player_index import PlayerIndex
+
+DATES = ['05.10.2024', '12.10.2024', '04.10.2025', '11.10.2025']
+
+
+@pytest.fixture(autouse=True)
+def metrics_in_memory():
+    configure_metrics(None)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = MatchArchive(str(tmp_path / 'match_archive'))
+    for tournament_id, date in enumerate(DATES, start=1):
+        pages = synthetic_tournament(8, seed=tournament_id)
+        page = tournament_scraper.TournamentPage.from_html(tournament_id, pages['info'], pages['results'], pages['bracket'])
+        archive.add_tournament(tournament_id, date, page.matches, page.standings)
+    return archive
+
+
+def indexed_tournaments(index: PlayerIndex) -> int:
+    return index._conn.execute("SELECT COUNT(*) FROM indexed_tournaments").fetchone()[0]
+
+
+def test_rebuilding_one_season_keeps_the_other_seasons_in_the_player_index(tmp_path, archive):
+    index = PlayerIndex(str(tmp_path / 'player_index.sqlite3'))
+    index.rebuild(archive.load_tournaments())
+    players = index.players()
+    profiles = {player: index.profile(player) for player in players}
+    assert indexed_tournaments(index) == 4
+
+    report = tournament_scraper.rebuild_season(SQLiteStore(str(tmp_path / 'leaderboard.sqlite3')), archive, seasons=[2025], index=index)
+
+    assert report['rebuilt_dates'] == DATES[2:]
+    assert indexed_tournaments(index) == 4
+    assert index.players() == players
+    assert {player: index.profile(player) for player in players} == profiles
+
+
+def test_rebuild_dry_run_leaves_store_and_index_untouched(tmp_path, archive):
+    store = SQLiteStore(str(tmp_path / 'leaderboard.sqlite3'))
+    index = PlayerIndex(str(tmp_path / 'player_index.sqlite3'))
+    report = tournament_scraper.rebuild_season(store, archive, seasons=[2024], dry_run=True, index=index)
+    assert report['changed_dates'] == DATES[:2]
+    assert store.list_tournaments() == []
+    assert index.players() == []
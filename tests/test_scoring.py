@@ -0,0 +1,18 @@
+# tests/test_scoring.py - Scoring rules loaded from JSON
+
+import pytest
+
+from scoring import ScoringRules
+
+
+def test_rules_from_dict_reads_string_ranks():
+    rules = ScoringRules.from_dict({'participation_points': 25, 'placement_points': {'1': 10, '2': 5}})
+    assert rules.participation_points == 25
+    assert rules.points_per_win == ScoringRules().points_per_win
+    assert list(rules.placement_table(3)) == [0, 10, 5, 0]
+
+
+@pytest.mark.parametrize('rank', ['0', '-1'])
+def test_rules_from_dict_rejects_ranks_below_one(rank):
+    with pytest.raises(ValueError, match='1 or higher'):
+        ScoringRules.from_dict({'placement_points': {rank: 5}})
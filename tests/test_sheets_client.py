@@ -0,0 +1,25 @@
+# tests/test_sheets_client.py - Quota limiting of Google Sheets calls
+
+import time
+
+from sheets_client import SlidingWindowLimiter
+
+
+def test_no_rolling_window_exceeds_the_limit():
+    limiter = SlidingWindowLimiter(3, window=0.2)
+    calls = []
+    for _ in range(7):
+        limiter.acquire()
+        calls.append(time.monotonic())
+    for i, start in enumerate(calls):
+        assert sum(1 for t in calls[i:] if t - start < 0.2) <= 3
+    # Seven calls at three per window need at least two full windows
+    assert calls[-1] - calls[0] >= 0.4
+
+
+def test_calls_below_the_limit_do_not_wait():
+    limiter = SlidingWindowLimiter(5, window=60)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - start < 0.1
@@ -0,0 +1,50 @@
+# tests/test_update_jobs.py - Background update jobs, run against cached fixture pages
+
+import time
+
+import pytest
+
+import tournament_scraper
+from benchmarks.fixtures import synthetic_tournament
+from leaderboard_store import SQLiteStore
+from pipeline_metrics import configure_metrics
+from update_jobs import JobRunner
+
+TOURNAMENT_ID = 848
+
+
+@pytest.fixture(autouse=True)
+def offline_pages(tmp_path):
+    configure_metrics(None)
+    cache = tournament_scraper.configure_page_cache(str(tmp_path / 'cache'), offline=True)
+    pages = synthetic_tournament(8)
+    for key, url in tournament_scraper.tournament_page_urls(TOURNAMENT_ID).items():
+        cache.store(url, pages[key])
+    yield
+    tournament_scraper.configure_page_cache(None)
+
+
+def wait(runner: JobRunner, job_id: str, timeout: float = 10):
+    deadline = time.time() + timeout
+    while not runner.get(job_id).is_finished:
+        assert time.time() < deadline, "Job did not finish in time."
+        time.sleep(0.01)
+    return runner.get(job_id)
+
+
+def test_job_is_done_even_if_on_write_fails(tmp_path):
+    def failing_refresh():
+        raise ConnectionError("Sheets API unavailable")
+
+    store = SQLiteStore(str(tmp_path / 'leaderboard.sqlite3'))
+    runner = JobRunner(store, on_write=failing_refresh)
+    job = wait(runner, runner.submit(TOURNAMENT_ID).job_id)
+    assert job.status == 'done', job.message
+    assert store.has_tournament(job.tournament_date)
+
+
+def test_resubmitted_tournament_is_skipped(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'leaderboard.sqlite3'))
+    runner = JobRunner(store)
+    assert wait(runner, runner.submit(TOURNAMENT_ID).job_id).status == 'done'
+    assert wait(runner, runner.submit(TOURNAMENT_ID).job_id).status == 'skipped'
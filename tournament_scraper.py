@@ -1,125 +1,482 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 import csv
+import hashlib
+import html as html_lib
 import logging
 import re
 import argparse
 from datetime import datetime
 import os
 import sys
-import gspread
 import json
+from page_cache import PageCache, DEFAULT_CACHE_DIR, DEFAULT_TTL_SECONDS
+from leaderboard_store import GoogleSheetsStore, SQLiteStore, update_leaderboard_sheet_batch
+from scoring import Match, ScoringRules, DEFAULT_RULES, parse_rank, score_season
+from pipeline_metrics import DEFAULT_METRICS_DIR, configure_metrics, log_run_summary, pipeline_run, stage
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
 
 # Define a User-Agent header to mimic a real browser
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
+DEFAULT_SHEET_NAME = "pocket viikkokisa leaderboard"
+# Upper bound on simultaneous requests to tspool.fi during batch runs
+DEFAULT_MAX_WORKERS = 8
+
+# HTTP settings shared by every request to tspool.fi
+REQUEST_TIMEOUT = (5, 30)  # (connect, read) seconds
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+HTTP_POOL_SIZE = 32
+# Fetches kept for the per-URL log of FETCH_STATS
+FETCH_STATS_HISTORY = 1000
+
+#region --- HTTP Fetch Layer ---
+class FetchStats:
+    """Thread-safe log of page fetches: latency, response size and retries per URL.
+
+    Only the last `history` fetches are kept for the per-URL log, so the
+    long-running app does not grow it forever; the summary totals cover every
+    fetch since the last reset.
+    """
+
+    def __init__(self, history: int = FETCH_STATS_HISTORY):
+        self._lock = threading.Lock()
+        self.records = deque(maxlen=history)
+        self._totals = self._empty_totals()
+
+    @staticmethod
+    def _empty_totals() -> dict:
+        return {'requests': 0, 'cache_hits': 0, 'bytes': 0, 'retries': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+
+    def record(self, url: str, status: int | str | None, elapsed: float, num_bytes: int, retries: int):
+        with self._lock:
+            self.records.append({'url': url, 'status': status, 'elapsed': elapsed, 'bytes': num_bytes, 'retries': retries})
+            totals = self._totals
+            totals['requests'] += 1
+            totals['cache_hits'] += status in ('cache', 304)
+            totals['bytes'] += num_bytes
+            totals['retries'] += retries
+            totals['total_seconds'] += elapsed
+            totals['max_seconds'] = max(totals['max_seconds'], elapsed)
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+            self._totals = self._empty_totals()
+
+    def summary(self) -> dict:
+        with self._lock:
+            summary = dict(self._totals)
+        summary['mean_seconds'] = summary['total_seconds'] / summary['requests'] if summary['requests'] else 0.0
+        return summary
+
+    def log_summary(self):
+        with self._lock:
+            records = list(self.records)
+        logging.info("--- HTTP Fetch Statistics ---")
+        for r in records:
+            logging.info(f"{r['elapsed']:7.3f}s | {r['bytes']:>9} B | {r['retries']} retries | {r['status']} | {r['url']}")
+        summary = self.summary()
+        logging.info(
+            f"{summary['requests']} requests ({summary['cache_hits']} from cache), {summary['bytes']} bytes, {summary['retries']} retries, "
+            f"mean {summary['mean_seconds']:.3f}s, max {summary['max_seconds']:.3f}s"
+        )
+
+FETCH_STATS = FetchStats()
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Returns the process-wide keep-alive session used for all tspool.fi requests."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+def fetch_page(url: str, headers: dict | None = None, timeout=REQUEST_TIMEOUT, max_retries: int = MAX_RETRIES) -> requests.Response:
+    """GETs a page through the shared session.
+
+    Connection errors, timeouts and 5xx responses are retried up to `max_retries` times
+    with exponential backoff. The last response is returned as-is, so callers still
+    decide what to do with a non-2xx status.
+    """
+    session = get_session()
+    start = time.perf_counter()
+    retries = 0
+    while True:
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+            if response.status_code in RETRY_STATUS_CODES and retries < max_retries:
+                logging.warning(f"Got HTTP {response.status_code} from {url}. Retrying ({retries + 1}/{max_retries})...")
+            else:
+                FETCH_STATS.record(url, response.status_code, time.perf_counter() - start, len(response.content), retries)
+                return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if retries >= max_retries:
+                FETCH_STATS.record(url, None, time.perf_counter() - start, 0, retries)
+                raise
+            logging.warning(f"Request to {url} failed: {e}. Retrying ({retries + 1}/{max_retries})...")
+        time.sleep(RETRY_BACKOFF_SECONDS * (2 ** retries))
+        retries += 1
+
+class PageNotCachedError(requests.exceptions.RequestException):
+    """Raised in offline mode when a page has never been cached."""
+
+_page_cache = None
+_page_cache_configured = False
+_page_cache_lock = threading.Lock()
+
+def configure_page_cache(cache_dir: str | None = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL_SECONDS, offline: bool = False) -> PageCache | None:
+    """Sets up (or, with cache_dir=None, disables) the on-disk page cache used by get_page_text."""
+    global _page_cache, _page_cache_configured
+    with _page_cache_lock:
+        if _page_cache is not None:
+            _page_cache.close()
+        _page_cache = PageCache(cache_dir, ttl=ttl, offline=offline) if cache_dir else None
+        _page_cache_configured = True
+        return _page_cache
+
+def get_page_cache() -> PageCache | None:
+    """Returns the active page cache, opening the default one on first use."""
+    global _page_cache, _page_cache_configured
+    # Checked under the lock: concurrent first fetches must share one cache, not close each other's
+    with _page_cache_lock:
+        if not _page_cache_configured:
+            _page_cache = PageCache()
+            _page_cache_configured = True
+        return _page_cache
+
+def get_page_text(url: str, headers: dict | None = None, max_age: float | None = None, refresh: bool = False) -> str:
+    """Returns the HTML of a page, from the page cache when possible.
+
+    Stale cache entries are revalidated with If-None-Match / If-Modified-Since, so an
+    unchanged page costs a 304 instead of a full download. `max_age` overrides the
+    cache TTL for this call (0 = always revalidate unless frozen). `refresh` revalidates
+    even frozen pages, e.g. to pick up results corrected after a tournament ended. Raises
+    requests.exceptions.RequestException (incl. HTTPError) on failure.
+    """
+    with stage('fetch', url=url, items=0) as record:
+        text, record['source'] = _get_page_text(url, headers, max_age, refresh)
+        record['bytes'] = len(text.encode('utf-8'))
+        record['items'] = 1
+        return text
+
+def _get_page_text(url: str, headers: dict | None, max_age: float | None, refresh: bool = False) -> tuple:
+    """get_page_text without tracing. Returns (html, source), source being 'cache', 'revalidated' or 'network'."""
+    cache = get_page_cache()
+    entry = cache.get(url) if cache else None
+    if refresh:
+        fresh = False
+    elif entry and max_age is not None:
+        fresh = entry['frozen'] or time.time() - entry['fetched_at'] < max_age
+    else:
+        fresh = bool(entry) and cache.is_fresh(entry)
+    if entry and (cache.offline or fresh):
+        FETCH_STATS.record(url, 'cache', 0.0, len(entry['body']), 0)
+        return entry['body'], 'cache'
+    if cache and cache.offline:
+        raise PageNotCachedError(f"{url} is not in the page cache and offline mode is enabled.")
+    request_headers = dict(headers or {})
+    if entry:
+        if entry['etag']:
+            request_headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            request_headers['If-Modified-Since'] = entry['last_modified']
+    response = fetch_page(url, headers=request_headers)
+    logging.info(f"HTTP Response for {response.url}: Status {response.status_code}, Content-Length: {len(response.content)}")
+    if response.status_code == 304 and entry:
+        cache.touch(url)
+        return entry['body'], 'revalidated'
+    response.raise_for_status()
+    if cache:
+        cache.store(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return response.text, 'network'
+
+def tournament_page_urls(tournament_id: int) -> dict:
+    return {
+        'info': f"https://tspool.fi/kisa/{tournament_id}",
+        'bracket': f"https://tspool.fi/kisa/{tournament_id}/kaavio/",
+        'results': f"https://tspool.fi/kisa/{tournament_id}/tulokset/",
+    }
+
+def freeze_tournament_pages(tournament_id: int, frozen: bool = True):
+    """Marks the cached pages of a finished tournament as final (or, with frozen=False, as live again)."""
+    cache = get_page_cache()
+    if cache is not None:
+        cache.freeze(list(tournament_page_urls(tournament_id).values()), frozen=frozen)
+
+def is_tournament_finished(standings: list) -> bool:
+    """A tournament is over once the results page lists a winner (its pages may still be corrected)."""
+    return any(standing['rank'] == '1.' for standing in standings)
+#endregion
+
 #region --- Data Extraction Functions ---
-def extract_tournament_date(tournament_id: int, headers: dict) -> str | None:
-    url = f"https://tspool.fi/kisa/{tournament_id}"
+FINNISH_MONTHS = {
+    "tammikuuta": "01", "helmikuuta": "02", "maaliskuuta": "03",
+    "huhtikuuta": "04", "toukokuuta": "05", "kesäkuuta": "06",
+    "heinäkuuta": "07", "elokuuta": "08", "syyskuuta": "09",
+    "lokakuuta": "10", "marraskuuta": "11", "joulukuuta": "12"
+}
+# Matches '<span class="fw-bold">Päivä</span>: 12. lokakuuta 2025' and captures the text after the span
+DATE_SPAN_PATTERN = re.compile(r'<span\b[^>]*\bclass=["\'][^"\']*\bfw-bold\b[^"\']*["\'][^>]*>\s*Päivä\s*</span>([^<]*)')
+RANK_PATTERN = re.compile(r"^\d+\.$")
+# The bracket page is parsed only down to the match cells
+MATCH_CONTAINER_STRAINER = SoupStrainer('td', class_='text-md-end')
+# Raw-HTML slices of the match cells, used to fingerprint them without parsing the page
+MATCH_CELL_PATTERN = re.compile(r'<td\b[^>]*\bclass=["\'][^"\']*\btext-md-end\b[^"\']*["\'][^>]*>.*?</td>', re.DOTALL)
+
+def format_finnish_date(date_text: str) -> str | None:
+    """Converts ': 12. lokakuuta 2025' into '12.10.2025'. Returns None if the text is not a valid date."""
+    cleaned_text = html_lib.unescape(date_text).strip().lstrip(':').strip()
+    parts = cleaned_text.split()
+    if len(parts) == 3:
+        day = parts[0].replace('.', '')
+        month_name = parts[1]
+        year = parts[2]
+        month_number = FINNISH_MONTHS.get(month_name)
+        if month_number:
+            final_date_str = f"{day}.{month_number}.{year}"
+            try:
+                datetime.strptime(final_date_str, '%d.%m.%Y')
+            except ValueError:
+                return None
+            return final_date_str
+    return None
+
+def parse_tournament_date(html: str) -> str | None:
+    """Finds the tournament date on the /kisa/{id} page. A regex over the raw HTML avoids building a DOM."""
+    with stage('parse', page='info', bytes=len(html.encode('utf-8'))) as record:
+        match = DATE_SPAN_PATTERN.search(html)
+        if match:
+            date_str = format_finnish_date(match.group(1))
+        else:
+            # Fall back to a full parse in case the markup around the span changes
+            soup = BeautifulSoup(html, HTML_PARSER)
+            span_tag = soup.find("span", class_="fw-bold", string="Päivä")
+            date_str = format_finnish_date(str(span_tag.next_sibling)) if span_tag and span_tag.next_sibling else None
+        if date_str:
+            logging.info(f"Found and formatted tournament date: {date_str}")
+        else:
+            logging.error("Could not find the tournament date using the specific <span> logic.")
+        record['items'] = 1 if date_str else 0
+        return date_str
+
+def _parse_score(score_text: str) -> int:
+    return int(score_text) if score_text.isdigit() else 0
+
+def parse_match_container(container) -> Match | None:
+    """Reads one td.text-md-end cell in a single pass over its divs. Returns None for unplayed matches."""
+    found = {}
+    for div in container.find_all('div', class_=True):
+        for css_class in div['class']:
+            if css_class == 'home-name':
+                key = 'home_name'
+            elif css_class == 'away-name':
+                key = 'away_name'
+            elif css_class.startswith('home-score'):
+                key = 'home_score'
+            elif css_class.startswith('away-score'):
+                key = 'away_score'
+            else:
+                continue
+            if key not in found:
+                found[key] = div.get_text(strip=True)
+    if len(found) < 4:
+        return None
+    player1 = found['home_name'].split('(')[0].strip()
+    player2 = found['away_name'].split('(')[0].strip()
+    score1 = found['home_score']
+    score2 = found['away_score']
+    if not (player1 and player2 and score1 and score2):
+        return None
+    return Match(
+        player1=player1,
+        player2=player2,
+        score1=_parse_score(score1),
+        score2=_parse_score(score2),
+        forfeit=player1.startswith('FF ') or player2.startswith('FF '),
+        walkover=player1.upper() == 'WO' or player2.upper() == 'WO',
+    )
+
+def parse_match_data(html: str) -> list:
+    """Extracts completed matches from the /kaavio/ bracket page as Match records."""
+    try:
+        with stage('parse', page='bracket', bytes=len(html.encode('utf-8')), items=0) as record:
+            soup = BeautifulSoup(html, HTML_PARSER, parse_only=MATCH_CONTAINER_STRAINER)
+            match_containers = soup.find_all('td', class_='text-md-end')
+            if not match_containers:
+                logging.warning("Could not find any match container cells ('<td class=\"text-md-end\">').")
+                return []
+            logging.info(f"Found {len(match_containers)} potential match containers. Processing for completed matches...")
+            extracted_data = []
+            for container in match_containers:
+                match = parse_match_container(container)
+                if match:
+                    extracted_data.append(match)
+            logging.info(f"Successfully extracted {len(extracted_data)} completed matches.")
+            record['items'] = len(extracted_data)
+            return extracted_data
+    except Exception as e:
+        logging.error(f"An unexpected error occurred in parse_match_data: {e}")
+        return []
+
+def parse_final_standings(html: str, top_n: int = 4) -> list:
+    """Extracts the top `top_n` non-forfeited players from the /tulokset/ results page."""
+    standings = []
+    try:
+        with stage('parse', page='results', bytes=len(html.encode('utf-8')), items=0) as record:
+            soup = BeautifulSoup(html, HTML_PARSER)
+            rank_texts = soup.find_all(string=RANK_PATTERN)
+            if not rank_texts:
+                logging.warning("Could not find any text matching the rank pattern (e.g., '1.').")
+                return []
+            logging.info(f"Found {len(rank_texts)} potential rank strings. Extracting top {top_n} players.")
+            for rank_text in rank_texts:
+                if len(standings) >= top_n: break
+                rank_element = rank_text.parent
+                player_div = rank_element.find_next_sibling('div')
+                if player_div:
+                    rank = rank_text.strip()
+                    player_name = player_div.get_text(strip=True)
+                    if player_name.strip().startswith('FF '):
+                        logging.info(f"Omitting forfeited player from standings: {player_name}")
+                        continue
+                    if player_name:
+                        standings.append({'rank': rank, 'player': player_name})
+                else:
+                    logging.warning(f"Found rank text '{rank_text.strip()}' but could not find a player div immediately after it.")
+            record['items'] = len(standings)
+            return standings
+    except Exception as e:
+        logging.error(f"An unexpected error occurred in parse_final_standings: {e}")
+        return []
+
+def extract_tournament_date(tournament_id: int, headers: dict | None = None) -> str | None:
+    url = tournament_page_urls(tournament_id)['info']
     logging.info(f"Fetching tournament date from {url}...")
-    finnish_months = {
-        "tammikuuta": "01", "helmikuuta": "02", "maaliskuuta": "03",
-        "huhtikuuta": "04", "toukokuuta": "05", "kesäkuuta": "06",
-        "heinäkuuta": "07", "elokuuta": "08", "syyskuuta": "09",
-        "lokakuuta": "10", "marraskuuta": "11", "joulukuuta": "12"
-    }
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        span_tag = soup.find("span", class_="fw-bold", string="Päivä")
-        if span_tag and span_tag.next_sibling:
-            date_text = str(span_tag.next_sibling)
-            cleaned_text = date_text.strip().lstrip(':').strip()
-            parts = cleaned_text.split()
-            if len(parts) == 3:
-                day = parts[0].replace('.', '')
-                month_name = parts[1]
-                year = parts[2]
-                month_number = finnish_months.get(month_name)
-                if month_number:
-                    final_date_str = f"{day}.{month_number}.{year}"
-                    logging.info(f"Found and formatted tournament date: {final_date_str}")
-                    datetime.strptime(final_date_str, '%d.%m.%Y')
-                    return final_date_str
-        logging.error("Could not find the tournament date using the specific <span> logic.")
-        return None
-    except (requests.exceptions.RequestException, ValueError, Exception) as e:
+        return parse_tournament_date(get_page_text(url, headers=headers))
+    except Exception as e:
         logging.error(f"Failed to extract or validate tournament date: {e}")
         return None
 
-def extract_match_data(url: str, headers: dict) -> list:
+def extract_match_data(url: str, headers: dict | None = None) -> list:
     logging.info(f"Fetching match data from {url}...")
     try:
-        response = requests.get(url, headers=headers)
-        logging.info(f"HTTP Response for {response.url}: Status {response.status_code}, Content-Length: {len(response.content)}")
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        match_containers = soup.find_all('td', class_='text-md-end')
-        if not match_containers:
-            logging.warning("Could not find any match container cells ('<td class=\"text-md-end\">').")
-            return []
-        logging.info(f"Found {len(match_containers)} potential match containers. Processing for completed matches...")
-        extracted_data = []
-        for container in match_containers:
-            home_name_div = container.find('div', class_='home-name')
-            away_name_div = container.find('div', class_='away-name')
-            home_score_div = container.find('div', class_=re.compile(r'^home-score'))
-            away_score_div = container.find('div', class_=re.compile(r'^away-score'))
-            if home_name_div and away_name_div and home_score_div and away_score_div:
-                player1_full_name = home_name_div.get_text(strip=True)
-                player2_full_name = away_name_div.get_text(strip=True)
-                player1 = player1_full_name.split('(')[0].strip()
-                player2 = player2_full_name.split('(')[0].strip()
-                score1 = home_score_div.get_text(strip=True)
-                score2 = away_score_div.get_text(strip=True)
-                if player1 and player2 and score1 and score2:
-                    extracted_data.append({'player1': player1, 'player2': player2, 'score': f"{score1} - {score2}"})
-        logging.info(f"Successfully extracted {len(extracted_data)} completed matches.")
-        return extracted_data
+        html = get_page_text(url, headers=headers)
     except requests.exceptions.RequestException as e:
         logging.error(f"An error occurred during the HTTP request: {e}")
         return []
-    except Exception as e:
-        logging.error(f"An unexpected error occurred in extract_match_data: {e}")
-        return []
+    return parse_match_data(html)
 
-def extract_final_standings(url: str, headers: dict, top_n: int = 4) -> list:
+def extract_final_standings(url: str, headers: dict | None = None, top_n: int = 4) -> list:
     logging.info(f"Fetching final standings from {url}...")
-    standings = []
     try:
-        response = requests.get(url, headers=headers)
-        logging.info(f"HTTP Response for {response.url}: Status {response.status_code}, Content-Length: {len(response.content)}")
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        rank_texts = soup.find_all(string=re.compile(r"^\d+\.$"))
-        if not rank_texts:
-            logging.warning("Could not find any text matching the rank pattern (e.g., '1.').")
-            return []
-        logging.info(f"Found {len(rank_texts)} potential rank strings. Extracting top {top_n} players.")
-        for rank_text in rank_texts:
-            if len(standings) >= top_n: break
-            rank_element = rank_text.parent
-            player_div = rank_element.find_next_sibling('div')
-            if player_div:
-                rank = rank_text.strip()
-                player_name = player_div.get_text(strip=True)
-                if player_name.strip().startswith('FF '):
-                    logging.info(f"Omitting forfeited player from standings: {player_name}")
-                    continue
-                if player_name:
-                    standings.append({'rank': rank, 'player': player_name})
-            else:
-                logging.warning(f"Found rank text '{rank_text.strip()}' but could not find a player div immediately after it.")
-        return standings
+        html = get_page_text(url, headers=headers)
     except requests.exceptions.RequestException as e:
         logging.error(f"An error occurred during the HTTP request: {e}")
         return []
-    except Exception as e:
-        logging.error(f"An unexpected error occurred in extract_final_standings: {e}")
-        return []
+    return parse_final_standings(html, top_n=top_n)
+
+def fetch_page_or_none(url: str, headers: dict | None = None, max_age: float | None = None) -> str | None:
+    """Like get_page_text, but logs request errors and returns None instead of raising."""
+    try:
+        return get_page_text(url, headers=headers, max_age=max_age)
+    except requests.exceptions.RequestException as e:
+        logging.error(f"An error occurred during the HTTP request to {url}: {e}")
+        return None
+
+@dataclass
+class TournamentPage:
+    """Everything scraped from one tournament: its date, top finishers and completed matches."""
+    tournament_id: int
+    date: str | None
+    standings: list = field(default_factory=list)
+    matches: list = field(default_factory=list)
+    # Pages that could not be fetched ('info', 'results', 'bracket') -> "ErrorClass: message"
+    fetch_errors: dict = field(default_factory=dict)
+    # Bracket cells without a completed match
+    unplayed: int = 0
+
+    @classmethod
+    def from_html(cls, tournament_id: int, info_html: str | None, results_html: str | None, bracket_html: str | None, top_n: int = 4) -> 'TournamentPage':
+        matches = parse_match_data(bracket_html) if bracket_html else []
+        return cls(
+            tournament_id=tournament_id,
+            date=parse_tournament_date(info_html) if info_html else None,
+            standings=parse_final_standings(results_html, top_n=top_n) if results_html else [],
+            matches=matches,
+            unplayed=len(MATCH_CELL_PATTERN.findall(bracket_html)) - len(matches) if bracket_html else 0,
+        )
+
+    @property
+    def is_finished(self) -> bool:
+        """Final enough to freeze the cached pages: a winner is listed and every bracket cell is played."""
+        return bool(self.matches) and not self.unplayed and is_tournament_finished(self.standings)
+
+    def to_dict(self) -> dict:
+        return {'tournament_id': self.tournament_id, 'date': self.date, 'standings': self.standings, 'matches': self.matches}
+
+def submit_page_fetches(executor: ThreadPoolExecutor, tournament_id: int, headers: dict | None = None, refresh: bool = False) -> dict:
+    """Starts fetching the pages of a tournament. Each fetch runs in a copy of the caller's context, so it is traced in the caller's run."""
+    return {
+        key: executor.submit(contextvars.copy_context().run, get_page_text, url, headers, None, refresh)
+        for key, url in tournament_page_urls(tournament_id).items()
+    }
+
+def collect_page_fetches(futures: dict) -> tuple:
+    """Waits for submit_page_fetches. Returns ({key: html or None}, {key: "ErrorClass: message"} of the failed pages)."""
+    pages, errors = {}, {}
+    for key, future in futures.items():
+        try:
+            pages[key] = future.result()
+        except requests.exceptions.RequestException as e:
+            logging.error(f"An error occurred during the HTTP request for the {key} page: {e}")
+            pages[key] = None
+            errors[key] = f"{type(e).__name__}: {e}"
+    return pages, errors
+
+def extract_tournament_page(tournament_id: int, headers: dict | None = None, top_n: int = 4, refresh: bool = False) -> TournamentPage:
+    """Fetches the info, results and bracket pages once each (concurrently) and parses them.
+
+    With `refresh`, pages cached as final are fetched again as well.
+    """
+    logging.info(f"Fetching pages of tournament {tournament_id}...")
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pages, errors = collect_page_fetches(submit_page_fetches(executor, tournament_id, headers, refresh=refresh))
+    page = TournamentPage.from_html(tournament_id, pages['info'], pages['results'], pages['bracket'], top_n=top_n)
+    page.fetch_errors = errors
+    update_page_freeze(page, refresh)
+    return page
+
+def update_page_freeze(page: TournamentPage, refresh: bool = False):
+    """Freezes the cached pages of a finished tournament; a refreshed one that is no longer final is unfrozen."""
+    if page.is_finished:
+        freeze_tournament_pages(page.tournament_id)
+    elif refresh and not page.fetch_errors:
+        freeze_tournament_pages(page.tournament_id, frozen=False)
 #endregion
 
 #region --- Data Processing and Export Functions ---
@@ -128,61 +485,34 @@ def calculate_win_counts(matches: list) -> dict:
     win_counts = {}
     logging.info("Calculating win counts from bracket data...")
     for match in matches:
-        try:
-            p1_name = match['player1']
-            p2_name = match['player2']
-            winner = None
-            
-            # REFACTORED: Determine winner first, then update count once.
-            if p1_name.strip().startswith('FF '):
-                winner = p2_name
-            elif p2_name.strip().startswith('FF '):
-                winner = p1_name
-            else:
-                score_parts = match['score'].split('-')
-                if len(score_parts) == 2:
-                    score1 = int(score_parts[0].strip())
-                    score2 = int(score_parts[1].strip())
-                    if score1 > score2:
-                        winner = p1_name
-                    elif score2 > score1:
-                        winner = p2_name
-            
-            if winner and winner.upper() != 'WO':
-                win_counts[winner] = win_counts.get(winner, 0) + 1
-        except (ValueError, IndexError):
-            continue
+        winner = match.winner
+        if winner:
+            win_counts[winner] = win_counts.get(winner, 0) + 1
     return win_counts
 
-def calculate_tournament_points(matches: list, win_counts: dict, standings: list) -> list:
+def calculate_tournament_points(matches: list, win_counts: dict, standings: list, rules: ScoringRules = DEFAULT_RULES) -> list:
     logging.info("Calculating detailed points breakdown for the current tournament...")
     all_players = set()
     for match in matches:
-        p1 = match['player1']
-        p2 = match['player2']
-        if p1.upper() != 'WO' and not p1.strip().startswith('FF '): all_players.add(p1)
-        if p2.upper() != 'WO' and not p2.strip().startswith('FF '): all_players.add(p2)
-    processed_data = []
-    for player in all_players:
-        participation_points = 30
-        wins = win_counts.get(player, 0)
-        match_win_points = wins * 5
-        top_player_points = 0
-        for standing in standings:
-            if standing['player'] == player:
-                if standing['rank'] == '1.': top_player_points = 2
-                elif standing['rank'] == '2.': top_player_points = 3
-                elif standing['rank'] == '3.': top_player_points = 4
-                break
-        final_points = participation_points + match_win_points + top_player_points
-        processed_data.append({
-            'Player': player,
-            'Number of Wins': wins,
-            'Points from Wins': match_win_points,
-            'Points from Ranking': top_player_points,
-            'Total Points': final_points
-        })
-    return processed_data
+        all_players.update(match.participants)
+    ranks = {}
+    for standing in standings:
+        ranks.setdefault(standing['player'], parse_rank(standing['rank']))
+    return [player_points_entry(player, win_counts.get(player, 0), ranks.get(player, 0), rules) for player in all_players]
+
+def player_points_entry(player: str, wins: int, rank: int, rules: ScoringRules = DEFAULT_RULES) -> dict:
+    """The points breakdown row of one tournament participant."""
+    participation_points = rules.participation_points
+    match_win_points = wins * rules.points_per_win
+    top_player_points = rules.placement_points.get(rank, 0)
+    final_points = participation_points + match_win_points + top_player_points
+    return {
+        'Player': player,
+        'Number of Wins': wins,
+        'Points from Wins': match_win_points,
+        'Points from Ranking': top_player_points,
+        'Total Points': final_points
+    }
 
 def save_tournament_csv(tournament_points: list, final_standings: list, filename: str):
     logging.info(f"Saving detailed tournament report to {filename}...")
@@ -210,106 +540,413 @@ def save_tournament_csv(tournament_points: list, final_standings: list, filename
         logging.error(f"Error writing detailed tournament CSV to file: {e}")
 
 def update_leaderboard_sheet(tournament_date: str, tournament_points: list, sheet_name: str, creds):
-    logging.info(f"Connecting to Google Sheets to update '{sheet_name}'...")
-    try:
-        if isinstance(creds, str):
-            credentials_dict = json.loads(creds)
-        else:
-            credentials_dict = creds
-        gc = gspread.service_account_from_dict(credentials_dict)
-        spreadsheet = gc.open(sheet_name)
-        worksheet = spreadsheet.sheet1
-    except Exception as e:
-        logging.error(f"Failed to connect to Google Sheets. Check credentials, sheet name, and sharing settings. Error: {e}")
-        raise
-    
-    # Need to import pandas here for this function to work
-    import pandas as pd 
-    leaderboard_data = [{'Player': p['Player'], 'Total Points': p['Total Points']} for p in tournament_points]
-    current_df = pd.DataFrame(leaderboard_data)
-    current_df = current_df.rename(columns={'Total Points': tournament_date})
-    existing_records = worksheet.get_all_records()
-    
-    if existing_records:
-        total_df = pd.DataFrame(existing_records)
-        if tournament_date in total_df.columns:
-            logging.warning(f"Tournament date {tournament_date} already exists in Google Sheet. Skipping update.")
-            return
-        total_df = pd.merge(total_df, current_df, on='Player', how='outer')
-    else:
-        total_df = current_df
-    total_df = total_df.fillna(0)
-    
-    fixed_cols = ['Player', 'Rank', 'Total Points']
-    score_columns = [col for col in total_df.columns if col not in fixed_cols]
-    
-    date_columns = []
-    for col in score_columns:
-        try:
-            datetime.strptime(str(col), '%d.%m.%Y')
-            date_columns.append(str(col))
-        except ValueError:
-            logging.warning(f"Ignoring non-date column '{col}' during final sorting and display.")
-    
-    for col in score_columns:
-        total_df[col] = pd.to_numeric(total_df[col], errors='coerce').fillna(0).astype(int)
-    total_df['Total Points'] = total_df[score_columns].sum(axis=1).astype(int)
-    total_df = total_df.sort_values(by='Total Points', ascending=False)
-    
-    if 'Rank' in total_df.columns:
-        total_df = total_df.drop(columns=['Rank'])
-    total_df.insert(0, 'Rank', range(1, 1 + len(total_df)))
-    
-    sorted_date_columns = sorted(date_columns, key=lambda d: datetime.strptime(d, '%d.%m.%Y'))
-    final_cols = ['Rank', 'Player'] + sorted_date_columns + ['Total Points']
-    total_df = total_df[final_cols]
-    try:
-        worksheet.clear()
-        worksheet.update([total_df.columns.values.tolist()] + total_df.values.tolist())
-        logging.info(f"Successfully updated Google Sheet '{sheet_name}'.")
-    except Exception as e:
-        logging.error(f"Could not write to Google Sheet '{sheet_name}'. Error: {e}")
-        raise
+    update_leaderboard_sheet_batch({tournament_date: tournament_points}, sheet_name, creds)
 #endregion
 
-def main():
-    """Main function to parse arguments and run the scraper logic for command-line use."""
-    parser = argparse.ArgumentParser(description="Extracts and processes tournament results from tspool.fi.", epilog="Example: python tournament_scraper.py 848")
-    parser.add_argument("tournament_id", type=int, help="The integer ID of the tournament (e.g., 848).")
-    args = parser.parse_args()
-    tournament_id = args.tournament_id
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-    tournament_date = extract_tournament_date(tournament_id, headers=HEADERS)
+#region --- Batch Processing Functions ---
+def parse_tournament_ids(specs: list) -> list:
+    """Expands ID arguments such as '848', '820-860' or '820,825' into a sorted list of unique IDs."""
+    tournament_ids = set()
+    for spec in specs:
+        for part in str(spec).split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if '-' in part:
+                start, end = (int(x) for x in part.split('-', 1))
+                if start > end:
+                    raise ValueError(f"Invalid tournament ID range '{part}': start is greater than end.")
+                tournament_ids.update(range(start, end + 1))
+            else:
+                tournament_ids.add(int(part))
+    return sorted(tournament_ids)
+
+def scrape_tournaments(tournament_ids: list, headers: dict | None = None, max_workers: int = DEFAULT_MAX_WORKERS, refresh: bool = False) -> list:
+    """Fetches the date, standings and bracket pages of every tournament concurrently.
+
+    At most `max_workers` requests are in flight at once; each page is then parsed
+    once into a TournamentPage. Tournaments without a valid date are dropped from the result.
+    With `refresh`, pages cached as final are fetched again as well.
+    """
+    logging.info(f"Scraping {len(tournament_ids)} tournament(s) with up to {max_workers} concurrent requests...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {tournament_id: submit_page_fetches(executor, tournament_id, headers, refresh=refresh) for tournament_id in tournament_ids}
+        scraped = []
+        for tournament_id, page_futures in futures.items():
+            pages, errors = collect_page_fetches(page_futures)
+            page = TournamentPage.from_html(tournament_id, pages['info'], pages['results'], pages['bracket'])
+            page.fetch_errors = errors
+            if not page.date:
+                reason = f" ({errors['info']})" if 'info' in errors else ""
+                logging.error(f"Could not determine tournament date for ID {tournament_id}{reason}. Skipping tournament.")
+                continue
+            update_page_freeze(page, refresh)
+            scraped.append(page.to_dict())
+    return scraped
+
+def score_tournament(tournament: dict, rules: ScoringRules = DEFAULT_RULES) -> list:
+    """Calculates the points breakdown for one scraped tournament (see scrape_tournaments)."""
+    if not tournament['matches']:
+        logging.warning(f"Could not retrieve any valid match results for tournament {tournament['tournament_id']}.")
+        return []
+    player_wins = calculate_win_counts(tournament['matches'])
+    return calculate_tournament_points(tournament['matches'], player_wins, tournament['standings'], rules=rules)
+
+def process_tournaments(tournament_ids: list, headers: dict | None = None, max_workers: int = DEFAULT_MAX_WORKERS, rules: ScoringRules = DEFAULT_RULES,
+                        refresh: bool = False) -> list:
+    """Scrapes and scores several tournaments. Each result carries a 'points' list next to the scraped data.
+
+    All tournaments are scored together in one pass of the season scoring engine.
+    """
+    tournaments = scrape_tournaments(tournament_ids, headers=headers, max_workers=max_workers, refresh=refresh)
+    for tournament in tournaments:
+        if not tournament['matches']:
+            logging.warning(f"Could not retrieve any valid match results for tournament {tournament['tournament_id']}.")
+    with stage('score', tournaments=len(tournaments)) as record:
+        season_scores = score_season(tournaments, rules=rules)
+        record['items'] = sum(len(tournament['matches']) for tournament in tournaments)
+    for j, tournament in enumerate(tournaments):
+        tournament['points'] = season_scores.tournament_points(j)
+    return tournaments
+
+def rebuild_season(store, archive, rules: ScoringRules = DEFAULT_RULES, seasons: list | None = None, dry_run: bool = False, index=None) -> dict:
+    """Rescores every archived tournament with `rules` and replaces their points in `store` in one write.
+
+    Nothing is fetched: matches and standings come from the MatchArchive `archive`
+    (by default its latest season). Returns the store's diff report; with `dry_run`
+    nothing is written. If a PlayerIndex `index` is given it is rebuilt from all
+    archived seasons, not only the rescored ones.
+    """
+    if seasons is None:
+        seasons = archive.seasons()[-1:]
+    with pipeline_run('rebuild', seasons=seasons, dry_run=dry_run):
+        tournaments = archive.load_tournaments(seasons)
+        if not tournaments:
+            raise ValueError(f"The match archive has no tournaments for season(s) {seasons}.")
+        with stage('score', tournaments=len(tournaments)) as record:
+            season_scores = score_season(tournaments, rules=rules)
+            record['items'] = sum(len(tournament['matches']) for tournament in tournaments)
+        for j, tournament in enumerate(tournaments):
+            tournament['points'] = season_scores.tournament_points(j)
+        logging.info(f"Rescored {len(tournaments)} archived tournament(s) of season(s) {seasons}.")
+        report = store.replace_tournaments(tournaments, dry_run=dry_run)
+        if index is not None and not dry_run:
+            # Ratings depend on the order of every earlier match, so the index always replays the whole archive
+            index.rebuild(tournaments if sorted(seasons) == archive.seasons() else archive.load_tournaments())
+    return report
+
+def update_leaderboard_from_tournaments(tournaments: list, sheet_name: str, creds) -> list:
+    """Writes the points of all processed tournaments to the leaderboard sheet in a single update."""
+    return GoogleSheetsStore(sheet_name, creds).add_tournaments(tournaments)
+#endregion
+
+#region --- Live Follow Mode ---
+class BracketFollower:
+    """Scores a running tournament incrementally from successive bracket snapshots.
+
+    Every match cell is fingerprinted on its raw HTML. Only cells whose fingerprint
+    changed since the previous snapshot are parsed, and only the players of those
+    matches have their points recomputed.
+    """
+
+    def __init__(self, rules: ScoringRules = DEFAULT_RULES, tournament_date: str | None = None):
+        self.rules = rules
+        self.tournament_date = tournament_date
+        self.win_counts = {}
+        self.standings = []
+        self._fingerprints = []
+        self._matches = []
+        self._appearances = {}
+        self._ranks = {}
+        self._dirty = set()
+        self._published = {}
+
+    @property
+    def matches(self) -> list:
+        return [match for match in self._matches if match]
+
+    def _apply(self, match: Match | None, sign: int):
+        if match is None:
+            return
+        for player in match.participants:
+            self._appearances[player] = self._appearances.get(player, 0) + sign
+            self._dirty.add(player)
+        winner = match.winner
+        if winner:
+            self.win_counts[winner] = self.win_counts.get(winner, 0) + sign
+            self._dirty.add(winner)
+
+    def update_bracket(self, html: str) -> int:
+        """Applies a bracket page snapshot. Returns the number of match cells that changed."""
+        cells = MATCH_CELL_PATTERN.findall(html)
+        changed = 0
+        for index, cell in enumerate(cells):
+            fingerprint = hashlib.blake2b(cell.encode('utf-8'), digest_size=16).digest()
+            if index < len(self._fingerprints) and self._fingerprints[index] == fingerprint:
+                continue
+            container = BeautifulSoup(cell, HTML_PARSER).find('td')
+            match = parse_match_container(container) if container else None
+            if index < len(self._fingerprints):
+                self._apply(self._matches[index], -1)
+                self._fingerprints[index] = fingerprint
+                self._matches[index] = match
+            else:
+                self._fingerprints.append(fingerprint)
+                self._matches.append(match)
+            self._apply(match, +1)
+            changed += 1
+        # Cells that disappeared from the bracket no longer count
+        for index in range(len(cells), len(self._fingerprints)):
+            self._apply(self._matches[index], -1)
+            changed += 1
+        del self._fingerprints[len(cells):]
+        del self._matches[len(cells):]
+        return changed
+
+    def update_standings(self, standings: list):
+        ranks = {}
+        for standing in standings:
+            ranks.setdefault(standing['player'], parse_rank(standing['rank']))
+        for player in set(ranks) | set(self._ranks):
+            if ranks.get(player) != self._ranks.get(player):
+                self._dirty.add(player)
+        self.standings = standings
+        self._ranks = ranks
+
+    @property
+    def is_finished(self) -> bool:
+        return bool(self.matches) and is_tournament_finished(self.standings)
+
+    @property
+    def unplayed(self) -> int:
+        """Bracket cells without a completed match."""
+        return sum(match is None for match in self._matches)
+
+    def points(self) -> list:
+        """The full points breakdown of the tournament so far."""
+        return [
+            player_points_entry(player, self.win_counts.get(player, 0), self._ranks.get(player, 0), self.rules)
+            for player, appearances in self._appearances.items() if appearances > 0
+        ]
+
+    def pending_changes(self) -> list:
+        """Points rows of the players whose total changed since the last call."""
+        changes = []
+        for player in self._dirty:
+            if self._appearances.get(player, 0) > 0:
+                entry = player_points_entry(player, self.win_counts.get(player, 0), self._ranks.get(player, 0), self.rules)
+            elif player in self._published:
+                # The player's only match was corrected away; zero the cell
+                entry = {'Player': player, 'Number of Wins': 0, 'Points from Wins': 0, 'Points from Ranking': 0, 'Total Points': 0}
+            else:
+                continue
+            if self._published.get(player) != entry['Total Points']:
+                changes.append(entry)
+                self._published[player] = entry['Total Points']
+        self._dirty.clear()
+        return changes
+
+def follow_tournament(tournament_id: int, store, interval: float = 60, rules: ScoringRules = DEFAULT_RULES,
+                      headers: dict | None = None, max_polls: int | None = None, on_update=None) -> BracketFollower:
+    """Polls a running tournament and pushes changed players' points to `store` until it finishes.
+
+    Each poll revalidates the bracket and results pages with conditional requests;
+    unchanged pages are skipped entirely. `on_update(changes)` is called after every
+    push. Returns the follower holding the final state.
+    """
+    tournament_date = extract_tournament_date(tournament_id, headers=headers)
     if not tournament_date:
-        logging.error(f"Could not determine tournament date for ID {tournament_id}. Aborting script.")
-        sys.exit(1)
-    logging.info(f"Processing tournament with ID: {tournament_id}, Date: {tournament_date}")
-    BRACKET_URL = f"https://tspool.fi/kisa/{tournament_id}/kaavio/"
-    RESULTS_URL = f"https://tspool.fi/kisa/{tournament_id}/tulokset/"
-    TOURNAMENT_CSV_FILENAME = f"tournament_{tournament_id}_{tournament_date.replace('.', '-')}.csv"
-    final_standings = extract_final_standings(RESULTS_URL, headers=HEADERS, top_n=4)
-    if final_standings:
-        logging.info("--- Top 4 Final Standings ---")
-        for standing in final_standings:
+        raise ValueError(f"Could not find a valid date for tournament ID {tournament_id}.")
+    urls = tournament_page_urls(tournament_id)
+    follower = BracketFollower(rules, tournament_date=tournament_date)
+    page_hashes = {}
+    polls = 0
+    logging.info(f"Following tournament {tournament_id} ({tournament_date}) every {interval}s...")
+    while True:
+        polls += 1
+        with pipeline_run('follow', tournament_id=tournament_id, poll=polls):
+            for key in ('bracket', 'results'):
+                html = fetch_page_or_none(urls[key], headers, max_age=0)
+                if html is None:
+                    continue
+                page_hash = hashlib.blake2b(html.encode('utf-8'), digest_size=16).digest()
+                if page_hashes.get(key) == page_hash:
+                    continue
+                page_hashes[key] = page_hash
+                if key == 'bracket':
+                    with stage('parse', page='bracket', bytes=len(html.encode('utf-8'))) as record:
+                        changed = record['items'] = follower.update_bracket(html)
+                    logging.info(f"{changed} match cell(s) changed in the bracket.")
+                else:
+                    follower.update_standings(parse_final_standings(html))
+            changes = follower.pending_changes()
+            if changes:
+                store.update_tournament_points(tournament_date, changes, tournament_id=tournament_id)
+                logging.info(f"Pushed updated points for {len(changes)} player(s).")
+                if on_update:
+                    on_update(changes)
+        if follower.is_finished:
+            logging.info(f"Tournament {tournament_id} is finished.")
+            if follower.unplayed:
+                logging.warning(f"{follower.unplayed} bracket cell(s) are still unplayed; the cached pages are not frozen.")
+            else:
+                freeze_tournament_pages(tournament_id)
+            return follower
+        if max_polls is not None and polls >= max_polls:
+            return follower
+        time.sleep(interval)
+#endregion
+
+def log_tournament_summary(tournament: dict):
+    """Logs the top 4 and the per-player win counts of a processed tournament."""
+    if tournament['standings']:
+        logging.info(f"--- Top 4 Final Standings (tournament {tournament['tournament_id']}) ---")
+        for standing in tournament['standings']:
             logging.info(f"Rank {standing['rank']:<3} {standing['player']}")
-    match_results = extract_match_data(BRACKET_URL, headers=HEADERS)
-    if match_results:
-        player_wins = calculate_win_counts(match_results)
+    if tournament['matches']:
+        player_wins = calculate_win_counts(tournament['matches'])
         if player_wins:
             sorted_wins = sorted(player_wins.items(), key=lambda item: item[1], reverse=True)
-            logging.info("--- Player Win Counts (from bracket) ---")
+            logging.info(f"--- Player Win Counts (tournament {tournament['tournament_id']}) ---")
             for player, wins in sorted_wins:
                 win_text = "win" if wins == 1 else "wins"
                 logging.info(f"{player:<25} | {wins} {win_text}")
-        if final_standings or player_wins:
-            current_tournament_points = calculate_tournament_points(match_results, player_wins, final_standings)
-            if current_tournament_points:
-                save_tournament_csv(current_tournament_points, final_standings, TOURNAMENT_CSV_FILENAME)
-                logging.info("Single-tournament CSV saved. To update master leaderboard, use the Streamlit app.")
+
+def log_rebuild_report(report: dict, dry_run: bool = False):
+    """Logs what a season rebuild changed (or, with dry_run, would change)."""
+    verb = "would change" if dry_run else "changed"
+    logging.info(f"--- Season Rebuild ({'dry run' if dry_run else 'published'}) ---")
+    logging.info(f"Rescored {len(report['rebuilt_dates'])} tournament(s); {len(report['changed_dates'])} {verb}: {', '.join(report['changed_dates']) or '-'}")
+    if report['kept_dates']:
+        logging.warning(f"Not in the match archive, left as they are: {', '.join(report['kept_dates'])}")
+    for change in report['total_changes']:
+        logging.info(f"{change['Player']:<25} | {change['Before']:>5} -> {change['After']:>5}")
+    if 'changed_cells' in report:
+        logging.info(f"{report['changed_cells']} sheet cell(s) {verb}.")
+
+def main():
+    """Main function to parse arguments and run the scraper logic for command-line use."""
+    parser = argparse.ArgumentParser(
+        description="Extracts and processes tournament results from tspool.fi.",
+        epilog="Examples: python tournament_scraper.py 848 | python tournament_scraper.py 820-860 | python tournament_scraper.py 820 825,830 --creds service_account.json"
+    )
+    parser.add_argument("tournament_ids", nargs='*', help="Tournament IDs, ranges or comma-separated lists (e.g., 848, 820-860, 820,825).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help=f"Maximum number of concurrent requests to tspool.fi (default: {DEFAULT_MAX_WORKERS}).")
+    parser.add_argument("--creds", help="Path to a Google service account JSON file. When given, the master leaderboard is updated once after all tournaments are scored.")
+    parser.add_argument("--stats", action='store_true', help="Print per-URL HTTP timing and per-stage pipeline statistics after the run.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"Directory of the on-disk page cache (default: '{DEFAULT_CACHE_DIR}', env TSPOOL_CACHE_DIR).")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL_SECONDS, help=f"Seconds before pages of unfinished tournaments are revalidated (default: {DEFAULT_TTL_SECONDS}).")
+    parser.add_argument("--no-cache", action='store_true', help="Always fetch pages from tspool.fi and do not cache them.")
+    parser.add_argument("--offline", action='store_true', help="Serve pages from the cache only and never touch the network.")
+    parser.add_argument("--refresh", action='store_true', help="Re-fetch the pages of the given tournaments even if they are cached as final, e.g. to archive corrected results before --rebuild.")
+    parser.add_argument("--rules", help="Path to a JSON scoring rule table, e.g. {\"participation_points\": 30, \"points_per_win\": 5, \"placement_points\": {\"1\": 2, \"2\": 3, \"3\": 4}}.")
+    parser.add_argument("--follow", action='store_true', help="Follow a running tournament: poll its bracket and push changed players' points to the leaderboard until it finishes. Needs exactly one tournament ID and --db or --creds.")
+    parser.add_argument("--interval", type=float, default=60, help="Seconds between polls in --follow mode (default: 60).")
+    parser.add_argument("--archive-dir", default=None, help="Directory of the columnar match archive (default: 'match_archive', env TSPOOL_ARCHIVE_DIR).")
+    parser.add_argument("--no-archive", action='store_true', help="Do not append scraped matches and standings to the match archive.")
+    parser.add_argument("--index-db", default=None, help="Path of the head-to-head and rating index (default: 'player_index.sqlite3', env TSPOOL_INDEX_PATH).")
+    parser.add_argument("--no-index", action='store_true', help="Do not add scraped matches to the player index.")
+    parser.add_argument("--metrics-dir", default=DEFAULT_METRICS_DIR, help=f"Directory for per-stage run metrics (pipeline_runs.jsonl and pipeline_metrics.prom; default: '{DEFAULT_METRICS_DIR}', env TSPOOL_METRICS_DIR).")
+    parser.add_argument("--rebuild", action='store_true', help="Rescore every archived tournament of a season with the current --rules and publish the corrected leaderboard in one write. Needs --db or --creds; takes no tournament IDs.")
+    parser.add_argument("--season", type=int, help="Season (year) to rebuild with --rebuild (default: the latest archived season).")
+    parser.add_argument("--dry-run", action='store_true', help="With --rebuild, only print what would change.")
+    parser.add_argument("--db", help="Path to a local SQLite leaderboard database. Scored tournaments are stored there (and exported to the sheet if --creds is also given).")
+    parser.add_argument("--sheet-name", default=DEFAULT_SHEET_NAME, help=f"Name of the leaderboard Google Sheet (default: '{DEFAULT_SHEET_NAME}').")
+    parser.add_argument("--sheet-key", help="Key (ID) of the leaderboard Google Sheet; opens it directly instead of searching by name.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    try:
+        tournament_ids = parse_tournament_ids(args.tournament_ids)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.rebuild and tournament_ids:
+        parser.error("--rebuild works from the match archive and takes no tournament IDs.")
+    if not (args.rebuild or tournament_ids):
+        parser.error("At least one tournament ID is required.")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    if args.no_cache and args.offline:
+        parser.error("--offline requires the page cache; it cannot be combined with --no-cache.")
+    if args.refresh and (args.offline or args.rebuild or args.follow):
+        parser.error("--refresh re-fetches the given tournaments in a batch run; it cannot be combined with --offline, --rebuild or --follow.")
+    configure_page_cache(None if args.no_cache else args.cache_dir, ttl=args.cache_ttl, offline=args.offline)
+    configure_metrics(args.metrics_dir)
+    rules = DEFAULT_RULES
+    if args.rules:
+        try:
+            with open(args.rules, encoding='utf-8') as f:
+                rules = ScoringRules.from_dict(json.load(f))
+        except OSError as e:
+            parser.error(f"Could not read scoring rules from {args.rules}: {e}")
+        except ValueError as e:
+            parser.error(f"Invalid scoring rules in {args.rules}: {e}")
+    sheet_store = None
+    if args.creds:
+        with open(args.creds, encoding='utf-8') as f:
+            sheet_store = GoogleSheetsStore(args.sheet_name, json.load(f), sheet_key=args.sheet_key)
+    store = SQLiteStore(args.db, export_store=sheet_store) if args.db else sheet_store
+    archive = None
+    if not args.no_archive:
+        from match_archive import MatchArchive, DEFAULT_ARCHIVE_DIR
+        archive = MatchArchive(args.archive_dir or DEFAULT_ARCHIVE_DIR)
+    index = None
+    if not args.no_index:
+        from player_index import PlayerIndex, DEFAULT_INDEX_PATH
+        index = PlayerIndex(args.index_db or DEFAULT_INDEX_PATH)
+    if args.rebuild:
+        if store is None:
+            parser.error("--rebuild needs --db or --creds to publish the corrected leaderboard.")
+        if archive is None:
+            parser.error("--rebuild reads the match archive; it cannot be combined with --no-archive.")
+        try:
+            report = rebuild_season(store, archive, rules=rules, seasons=[args.season] if args.season else None,
+                                    dry_run=args.dry_run, index=index)
+        except ValueError as e:
+            logging.error(f"Could not rebuild the leaderboard: {e}")
+            sys.exit(1)
+        log_rebuild_report(report, dry_run=args.dry_run)
+        return
+    if args.follow:
+        if len(tournament_ids) != 1:
+            parser.error("--follow needs exactly one tournament ID.")
+        if store is None:
+            parser.error("--follow needs --db or --creds to publish points.")
+        try:
+            follower = follow_tournament(tournament_ids[0], store, interval=args.interval, rules=rules)
+        except (ValueError, KeyboardInterrupt) as e:
+            logging.error(f"Stopped following tournament {tournament_ids[0]}: {e or 'interrupted'}")
+            sys.exit(1)
+        if follower.is_finished:
+            if archive:
+                archive.add_tournament(tournament_ids[0], follower.tournament_date, follower.matches, follower.standings)
+            if index:
+                index.add_tournament(tournament_ids[0], follower.tournament_date, follower.matches)
+        return
+    with pipeline_run('batch', tournament_ids=sorted(tournament_ids)) as run:
+        tournaments = process_tournaments(tournament_ids, max_workers=args.workers, rules=rules, refresh=args.refresh)
+        if args.stats:
+            FETCH_STATS.log_summary()
+        if not tournaments:
+            logging.error(f"Could not determine a tournament date for any of the IDs {tournament_ids}. Aborting script.")
+            sys.exit(1)
+        if archive:
+            archive.add_tournaments(tournaments)
+        if index:
+            index.add_tournaments(tournaments)
+        for tournament in tournaments:
+            logging.info(f"Processing tournament with ID: {tournament['tournament_id']}, Date: {tournament['date']}")
+            log_tournament_summary(tournament)
+            if tournament['points']:
+                filename = f"tournament_{tournament['tournament_id']}_{tournament['date'].replace('.', '-')}.csv"
+                save_tournament_csv(tournament['points'], tournament['standings'], filename)
             else:
-                logging.warning("No player points were calculated for this tournament.")
-    else:
-        logging.warning("Could not retrieve any valid match results from the bracket.")
+                logging.warning(f"No player points were calculated for tournament {tournament['tournament_id']}.")
+        if store:
+            store.add_tournaments(tournaments)
+        else:
+            logging.info("Tournament CSVs saved. To update the master leaderboard, pass --creds or --db, or use the Streamlit app.")
+    if args.stats:
+        log_run_summary(run)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
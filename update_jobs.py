@@ -0,0 +1,169 @@
+# update_jobs.py - Background tournament update jobs for the update page
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+
+import tournament_scraper
+from leaderboard_store import LeaderboardStore
+from pipeline_metrics import pipeline_run, stage
+from scoring import ScoringRules, DEFAULT_RULES
+
+# Pipeline stages in order, with the progress fraction reached when each starts
+STAGES = {
+    'queued': 0.0,
+    'fetching': 0.1,
+    'scoring': 0.6,
+    'writing': 0.8,
+    'done': 1.0,
+}
+FINISHED_STATUSES = ('done', 'skipped', 'failed')
+
+
+@dataclass
+class UpdateJob:
+    """State of one scrape -> score -> write run, as shown on the update page."""
+    job_id: str
+    tournament_id: int
+    status: str = 'queued'  # queued | running | done | skipped | failed
+    stage: str = 'queued'
+    progress: float = 0.0
+    message: str = 'Waiting for a worker...'
+    tournament_date: str | None = None
+    refresh: bool = False  # re-fetch pages even if cached as final
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+
+class JobRunner:
+    """
+    Runs tournament updates on worker threads owned by the app process.
+
+    Submitting a tournament that already has a queued or running job returns
+    that job instead of starting a second one. Store writes are serialized by
+    `write_lock`, and the duplicate-date check is repeated under the lock, so
+    two jobs can never add the same tournament. `on_write` is called after each
+    successful write (e.g. to refresh the leaderboard cache); its errors are
+    only logged, since the write has already succeeded. If `archive` is
+    given, every fetched tournament is also added to that MatchArchive, and
+    `index` (a PlayerIndex) gets the matches of every tournament written.
+    A job submitted with `refresh` fetches pages cached as final again, so a
+    result corrected after the tournament ended reaches the archive (and from
+    there the next season rebuild).
+    """
+
+    def __init__(self, store: LeaderboardStore, max_workers: int = 2, rules: ScoringRules = DEFAULT_RULES,
+                 on_write=None, history: int = 20, archive=None, index=None):
+        self.store = store
+        self.archive = archive
+        self.index = index
+        self.rules = rules
+        self.on_write = on_write
+        self.history = history
+        self.write_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='update-job')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = {}
+
+    def submit(self, tournament_id: int, refresh: bool = False) -> UpdateJob:
+        with self._lock:
+            active_id = self._active.get(tournament_id)
+            if active_id is not None:
+                return replace(self._jobs[active_id])
+            job = UpdateJob(job_id=uuid.uuid4().hex[:8], tournament_id=tournament_id, refresh=refresh)
+            self._jobs[job.job_id] = job
+            self._active[tournament_id] = job.job_id
+            self._trim()
+        self._executor.submit(self._run, job.job_id)
+        return replace(job)
+
+    def get(self, job_id: str) -> UpdateJob | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job) if job else None
+
+    def recent_jobs(self) -> list:
+        """Copies of the most recent jobs, newest first."""
+        with self._lock:
+            jobs = [replace(job) for job in self._jobs.values()]
+        return sorted(jobs, key=lambda job: job.submitted_at, reverse=True)
+
+    def _trim(self):
+        finished = sorted((job for job in self._jobs.values() if job.is_finished), key=lambda job: job.submitted_at)
+        for job in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job.job_id]
+
+    def _update(self, job_id: str, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            for key, value in changes.items():
+                setattr(job, key, value)
+            if 'stage' in changes:
+                job.progress = STAGES[changes['stage']]
+            if job.is_finished:
+                job.finished_at = time.time()
+                self._active.pop(job.tournament_id, None)
+
+    def _run(self, job_id: str):
+        with self._lock:
+            tournament_id, refresh = self._jobs[job_id].tournament_id, self._jobs[job_id].refresh
+        try:
+            with pipeline_run('update_job', tournament_id=tournament_id, job_id=job_id):
+                self._update(job_id, status='running', stage='fetching', message=f"Fetching tournament {tournament_id} from tspool.fi...")
+                page = tournament_scraper.extract_tournament_page(tournament_id, refresh=refresh)
+                if not page.date:
+                    if 'info' in page.fetch_errors:
+                        raise ValueError(f"Could not fetch the page of tournament {tournament_id}: {page.fetch_errors['info']}")
+                    raise ValueError(f"Could not find a valid date for tournament ID {tournament_id}.")
+                self._update(job_id, tournament_date=page.date)
+                # Archived even if already on the leaderboard, so a season rebuild picks up corrected results
+                if self.archive is not None and page.matches:
+                    try:
+                        self.archive.add_tournament(tournament_id, page.date, page.matches, page.standings)
+                    except Exception as e:
+                        logging.error(f"Could not archive tournament {tournament_id}: {e}")
+                if self.store.has_tournament(page.date):
+                    message = f"This tournament (Date: {page.date}) already exists in the leaderboard."
+                    if refresh and self.archive is not None and page.matches:
+                        message += " Its archived results were re-fetched; rebuild the season to publish any corrections."
+                    else:
+                        message += " No action taken."
+                    self._update(job_id, status='skipped', stage='done', message=message)
+                    return
+                if not page.matches:
+                    if 'bracket' in page.fetch_errors:
+                        raise ValueError(f"Could not fetch the bracket: {page.fetch_errors['bracket']}")
+                    raise ValueError("Could not retrieve any valid match results from the bracket.")
+
+                self._update(job_id, stage='scoring', message=f"Scoring {len(page.matches)} matches...")
+                with stage('score', tournaments=1, items=len(page.matches)):
+                    points = tournament_scraper.score_tournament(page.to_dict(), rules=self.rules)
+                if not points:
+                    raise ValueError("No player points were calculated for this tournament.")
+
+                self._update(job_id, stage='writing', message="Waiting to update the master leaderboard...")
+                with self.write_lock:
+                    self._update(job_id, message="Updating master leaderboard...")
+                    if not self.store.add_tournament(page.date, points, tournament_id=tournament_id):
+                        self._update(job_id, status='skipped', stage='done', message=f"This tournament (Date: {page.date}) already exists in the leaderboard. No action taken.")
+                        return
+                    if self.index is not None:
+                        self.index.add_tournament(tournament_id, page.date, page.matches)
+                    if self.on_write:
+                        # The tournament is stored; a failing callback must not report the job as failed
+                        try:
+                            self.on_write()
+                        except Exception as e:
+                            logging.error(f"on_write callback after storing tournament {tournament_id} failed: {e}")
+                self._update(job_id, status='done', stage='done', message=f"Leaderboard updated with {len(points)} players from {page.date}.")
+        except Exception as e:
+            logging.error(f"Update job {job_id} for tournament {tournament_id} failed: {e}")
+            self._update(job_id, status='failed', message=str(e))